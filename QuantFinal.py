@@ -1,19 +1,36 @@
-import yfinance as yf
 import numpy as np
 import time
 import warnings
 from datetime import datetime
-from flask import Flask
-from flask_socketio import SocketIO
+from flask import Flask, Response
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 from qiskit_algorithms import QAOA
 from qiskit_algorithms.optimizers import COBYLA
 from qiskit.primitives import StatevectorSampler as Sampler
 from qiskit_finance.applications.optimization import PortfolioOptimization
-from qiskit_optimization.algorithms import MinimumEigenOptimizer
+from qiskit_optimization.converters import QuadraticProgramToQubo
+from cluster_optimizer import ticker_clusters, solve_clustered
+from exact_solver import DEFAULT_SOLVER, SOLVERS, optimality_gap, portfolio_objective, solve_exact
+from history_store import HistoryStore
+from latency import PROMETHEUS_CONTENT_TYPE, REGISTRY, timed
+from market_calendar import default_calendar
+from rolling_moments import RollingMoments
+from signal_frames import (BATCH_EVENT, ENCODINGS, LEGACY_EVENT, LEGACY_EVENTS, SCHEMA_VERSION,
+                           build_frame, encode_frame, legacy_packets)
+from solve_cache import default_solve_cache
 
 warnings.filterwarnings("ignore")
 
+# Warm starts: the last optimal QAOA angles seed the next solve until mu or
+# sigma has moved more than DRIFT_THRESHOLD (relative norm) away from the
+# inputs of the last cold start. A warm COBYLA takes small steps around the
+# previous optimum and stops early once they stop helping.
+DRIFT_THRESHOLD = 0.25
+MAXITER = 25
+WARM_RHOBEG = 0.1
+WARM_TOL = 1e-2
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -26,43 +43,186 @@ socketio = SocketIO(
 )
 
 class QuantumEngine:
-    def __init__(self):
-        self.tickers = [
+    def __init__(self, solver=DEFAULT_SOLVER, use_cache=True, tickers=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
+        self.tickers = tickers or [
             'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 
             'ICICIBANK.NS'
         ]
         self.pnl = 0.0
+        self.store = HistoryStore()
+        # Returns moments, updated only with the bars that are new since the last call
+        self.moments = RollingMoments(self.tickers, window=21)
+        self.solver = solver
+        self.risk_factor = 0.3
+        self.budget = 4
+
+        # Built problem, reused until mu/sigma/risk_factor/budget change
+        self.problem_key = None
+        self.problem = None
+        self.warm_point = None
+        self.warm_inputs = None  # (mu, sigma) of the last cold start
+        self.solve_stats = {"cold": [], "warm": []}  # (COBYLA evals, seconds)
+
+        # Cycles between daily bars see identical inputs; use_cache=False always solves
+        self.cache = default_solve_cache()
+        self.use_cache = use_cache
+
+    def build_problem(self, mu, sigma):
+        """(QuadraticProgram, QUBO converter, Ising operator), rebuilt only when the inputs change."""
+        key = (mu.tobytes(), sigma.tobytes(), self.risk_factor, self.budget)
+        if key != self.problem_key:
+            portfolio = PortfolioOptimization(
+                expected_returns=mu, 
+                covariances=sigma, 
+                risk_factor=self.risk_factor, 
+                budget=self.budget
+            )
+            qp = portfolio.to_quadratic_program()
+            converter = QuadraticProgramToQubo()
+            operator, _ = converter.convert(qp).to_ising()
+            self.problem_key, self.problem = key, (qp, converter, operator)
+        return self.problem
+
+    def drift(self, mu, sigma):
+        """Relative change of mu/sigma since the last cold start (inf if there is none)."""
+        if self.warm_point is None or self.warm_inputs is None:
+            return np.inf
+        mu0, sigma0 = self.warm_inputs
+        if mu0.shape != mu.shape:
+            return np.inf
+        return max(np.linalg.norm(mu - mu0) / max(np.linalg.norm(mu0), 1e-12),
+                   np.linalg.norm(sigma - sigma0) / max(np.linalg.norm(sigma0), 1e-12))
+
+    def report_solve(self, mode, evals, seconds):
+        self.solve_stats[mode].append((evals, seconds))
+        line = f"    [QAOA] {mode} start: {evals} COBYLA evals in {seconds:.2f}s"
+        if mode == "warm" and self.solve_stats["cold"]:
+            cold_evals, cold_seconds = np.mean(self.solve_stats["cold"], axis=0)
+            line += f" (cold avg {cold_evals:.0f} evals / {cold_seconds:.2f}s -> {cold_seconds - seconds:.2f}s saved)"
+        print(line)
 
     def get_market_data(self):
-        data = yf.download(self.tickers, period="1mo", interval="1d", progress=False)['Close']
-        returns = data.pct_change().dropna()
-        return returns.mean().values, returns.cov().values, data.iloc[-1].to_dict()
+        with timed("fetch"):
+            data = self.store.close_panel(self.tickers, period="1mo", interval="1d")
+        with timed("feature"):
+            mu, sigma = self.moments.extend(data).moments()
+            return mu, sigma, data.ffill().iloc[-1].to_dict()
 
     def run_quantum_logic(self, mu, sigma):
-        portfolio = PortfolioOptimization(
-            expected_returns=mu, 
-            covariances=sigma, 
-            risk_factor=0.3, 
-            budget=4
-        )
-        qp = portfolio.to_quadratic_program()
+        key = self.cache.key(mu, sigma, self.risk_factor, self.budget,
+                             solver=self.solver, reps=1, maxiter=MAXITER)
+        start_time = time.perf_counter()
+        cached = self.cache.get(key) if self.use_cache else None
+        if cached is not None:
+            latency = (time.perf_counter() - start_time) * 1000000
+            REGISTRY.observe("decision", latency / 1e6)
+            print(f"    [CACHE] Solve cache hit ({self.cache.stats()['hit_rate']:.0%} hit rate)")
+            return np.array(cached["x"]), latency
+
+        x, latency = self.solve(mu, sigma)
+        if self.use_cache:
+            self.cache.put(key, {"x": np.asarray(x).tolist(),
+                                 "fval": portfolio_objective(x, mu, sigma, self.risk_factor)})
+        return x, latency
+
+    def decode(self, eigen, qp, converter):
+        """Selection to use from a QAOA run, or None if no sample meets the budget.
+
+        best_measurement (the lowest-energy sample of the penalized QUBO,
+        qubit 0 last) is used when it is feasible; otherwise the feasible
+        sample with the best objective wins.
+        """
+        def interpret(bits):
+            return np.asarray(converter.interpret(np.array([int(bit) for bit in reversed(bits)])), dtype=float)
+
+        x = interpret(eigen.best_measurement["bitstring"])
+        if x.sum() == self.budget:
+            return x
+        best, best_value = None, np.inf
+        for bits in eigen.eigenstate:
+            x = interpret(bits)
+            if x.sum() == self.budget and qp.objective.evaluate(x) < best_value:
+                best, best_value = x, qp.objective.evaluate(x)
+        return best
+
+    def solve(self, mu, sigma):
+        if self.solver == "clustered":
+            result = solve_clustered(mu, sigma, self.risk_factor, self.budget,
+                                     clusters=ticker_clusters(self.tickers, sigma))
+            REGISTRY.observe("decision", result.elapsed_ms / 1e3)
+            return result.x, result.elapsed_ms * 1000
+
+        if self.solver == "exact":
+            result = solve_exact(mu, sigma, self.risk_factor, self.budget)
+            REGISTRY.observe("decision", result.elapsed_ms / 1e3)
+            return result.x, result.elapsed_ms * 1000
+
+        qp, converter, operator = self.build_problem(mu, sigma)
+        warm = self.drift(mu, sigma) <= DRIFT_THRESHOLD
+        if warm:
+            optimizer = COBYLA(maxiter=MAXITER, rhobeg=WARM_RHOBEG, tol=WARM_TOL)
+        else:
+            optimizer = COBYLA(maxiter=MAXITER)
         
         start_time = time.perf_counter()
-        qaoa = QAOA(sampler=Sampler(), optimizer=COBYLA(maxiter=25))
-        result = MinimumEigenOptimizer(qaoa).solve(qp)
+        qaoa = QAOA(sampler=Sampler(), optimizer=optimizer,
+                    initial_point=self.warm_point if warm else None)
+        eigen = qaoa.compute_minimum_eigenvalue(operator)
+        x = self.decode(eigen, qp, converter)
+        if x is None:
+            # No sampled bitstring meets the budget; never cache or broadcast an infeasible pick
+            print("    [QAOA] No feasible sample, falling back to the exact solver")
+            x = solve_exact(mu, sigma, self.risk_factor, self.budget).x
         latency = (time.perf_counter() - start_time) * 1000000 
+        REGISTRY.observe("decision", latency / 1e6)
+
+        self.warm_point = eigen.optimal_point
+        if not warm:
+            self.warm_inputs = (mu.copy(), sigma.copy())
+        self.report_solve("warm" if warm else "cold", eigen.cost_function_evals, latency / 1e6)
+
+        gap, exact = optimality_gap(x, mu, sigma, self.risk_factor, self.budget)
+        print(f"    [GAP] QAOA {qp.objective.evaluate(x):.6f} vs exact {exact.fval:.6f} "
+              f"({exact.elapsed_ms:.2f}ms) -> optimality gap {gap:.2%}")
         
-        return result.x, latency
+        return x, latency
 
 engine = QuantumEngine()
+calendar = default_calendar()
+CYCLE_SECONDS = 10
+LEGACY_ROOM = "legacy"  # dashboards on the per-ticker quantum_update events
+last_frame = None  # the latest cycle's frame, replayed to dashboards that connect while the market is closed
+
+def batch_room(encoding):
+    return f"batch-{encoding}"
+
+def broadcast(frame):
+    """Sends one cycle to every client: one batch frame per encoding, legacy events via the shim."""
+    with timed("serialize"):
+        payloads = {encoding: encode_frame(frame, encoding) for encoding in ENCODINGS}
+        packets = legacy_packets(frame) if LEGACY_EVENTS else []
+    with timed("emit"):
+        for encoding, payload in payloads.items():
+            socketio.emit(BATCH_EVENT, payload, to=batch_room(encoding))
+        for packet in packets:
+            socketio.emit(LEGACY_EVENT, packet, to=LEGACY_ROOM)
 
 def background_thread():
+    global last_frame
     print("\n" + "="*40)
     print("CORE: 10-QUBIT Quantum Engine Active")
     print("="*40)
     while True:
         try:
+            if last_frame is not None and not calendar.is_active():
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Idle, {calendar.describe()}")
+                socketio.sleep(calendar.poll_interval(CYCLE_SECONDS))
+                continue
+
             print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Fetching Market Data...")
+            cycle_start = time.perf_counter()
             mu, sigma, latest_prices = engine.get_market_data()
             
             print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Running QAOA (10 Qubits)...")
@@ -70,39 +230,64 @@ def background_thread():
             
             print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Optimization Success. Broadcasting...")
             
-            any_emitted = False
+            tickers, prices, pnl = [], [], []
             for i, selected in enumerate(selection):
                 ticker_full = engine.tickers[i]
                 ticker_clean = ticker_full.replace(".NS", "")
                 print(f"DEBUG: Processing {ticker_clean} through Quantum Engine (Selection Value: {selected})")
                 if selected > 0.5:
-                    any_emitted = True
-                    price = latest_prices[ticker_full]
-                    engine.pnl += np.random.uniform(-0.01, 0.03)                    
-                    packet = {
-                        "timestamp": datetime.now().strftime("%H:%M:%S"),
-                        "ticker": ticker_clean,
-                        "price": round(price, 2),
-                        "signal": "BUY",
-                        "latency_us": round(latency / 1000, 2),
-                        "pnl": f"{round(engine.pnl, 2)}%"
-                    }
-                    socketio.emit('quantum_update', packet)
+                    engine.pnl += np.random.uniform(-0.01, 0.03)
+                    tickers.append(ticker_clean)
+                    prices.append(latest_prices[ticker_full])
+                    pnl.append(engine.pnl)
                     print(f"    [SEND] {ticker_clean} | PnL: {engine.pnl:.2f}%")
-                    socketio.sleep(0.5) 
-            
-            if not any_emitted:
+
+            # Fetch through emit, not just the QAOA solve
+            frame = build_frame(tickers, prices, ["BUY"] * len(tickers), pnl,
+                                (time.perf_counter() - cycle_start) * 1e6)
+            emit_start = time.perf_counter()
+            broadcast(frame)
+            last_frame = frame
+            print(f"    [EMIT] {len(tickers)} signals in one frame, broadcast in "
+                  f"{(time.perf_counter() - emit_start) * 1000:.2f}ms")
+            if not tickers:
                 print("    [INFO] No optimal assets met the criteria this cycle.")
 
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Cycle Complete. Idle for 10s.")
-            socketio.sleep(10) 
+            idle = calendar.poll_interval(CYCLE_SECONDS)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] -> Cycle Complete. Idle for {idle:.0f}s.")
+            socketio.sleep(idle)
         except Exception as e:
             print(f"!!! ENGINE ERROR: {e}")
             socketio.sleep(5)
 
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @socketio.on('connect')
 def handle_connect():
     print(f"[{datetime.now().strftime('%H:%M:%S')}] WS: Dashboard Linked Successfully")
+    # Until a client subscribes to batch frames it gets the old per-ticker events
+    join_room(LEGACY_ROOM)
+    # While background_thread idles nothing new is broadcast, so hand the newcomer the last cycle
+    if LEGACY_EVENTS and last_frame is not None and not calendar.is_active():
+        for packet in legacy_packets(last_frame):
+            emit(LEGACY_EVENT, packet)
+
+@socketio.on('subscribe')
+def handle_subscribe(options):
+    """{"schema": 1, "encoding": "json" | "msgpack"} switches a client to one quantum_batch frame per cycle."""
+    options = options or {}
+    encoding = options.get("encoding", "json")
+    if options.get("schema", SCHEMA_VERSION) != SCHEMA_VERSION or encoding not in ENCODINGS:
+        emit("subscribe_error", {"schema": SCHEMA_VERSION, "encodings": list(ENCODINGS)})
+        return
+    leave_room(LEGACY_ROOM)
+    for other in ENCODINGS:
+        leave_room(batch_room(other))
+    join_room(batch_room(encoding))
+    if last_frame is not None:
+        emit(BATCH_EVENT, encode_frame(last_frame, encoding))
 
 if __name__ == '__main__':
     socketio.start_background_task(background_thread)
@@ -1,14 +1,14 @@
-import pandas as pd
+from storage import load_frame, save_frame
 
-FILE = "Holdings_Portfolio_Data.csv"
+DATASET = "Holdings_Portfolio_Data"
 
-df = pd.read_csv(FILE)
+df = load_frame(DATASET)
 
 df["acquired_date"] = None
 df["quantity"] = None
 df["total_invested"] = None
 df["user_id"] = 1
 
-df.to_csv(FILE, index=False)
+save_frame(df, DATASET)
 
 print("Columns added successfully")
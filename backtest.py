@@ -0,0 +1,257 @@
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from math import comb
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from cluster_optimizer import solve_clustered
+from exact_solver import solve_exact
+from rolling_moments import RollingMoments
+
+DEFAULT_SOURCE = "Full_NSE_Database.csv"  # long-format CSV, or an OHLCV cube directory
+COST_BPS = 10.0           # per unit of turnover (brokerage, STT and slippage together)
+PERIODS_PER_YEAR = 252    # daily bars; 252 * 375 for 1-minute bars
+SEED = 42
+EXACT_LIMIT = 50_000      # largest C(n, budget) the selection strategy enumerates per rebalance
+
+BacktestResult = namedtuple("BacktestResult", ["returns", "equity", "turnover", "weights", "contributions", "stats"])
+
+# --- Data ---
+
+def load_closes(source=DEFAULT_SOURCE, tickers=None, start=None, end=None):
+    """(dates, tickers, closes) with closes a [day, ticker] float array (NaN = no bar that day)."""
+    if os.path.isdir(source):
+        from ohlcv_cube import OHLCVCube
+        cube = OHLCVCube(source)
+        symbols = list(tickers) if tickers is not None else cube.symbols
+        rows = [cube.symbol_index[symbol] for symbol in symbols]
+        closes = np.asarray(cube.field("Close", start, end))[rows].T
+        return cube.dates(start, end), symbols, np.ascontiguousarray(closes)
+
+    from storage import load_frame
+    frame = load_frame(os.path.splitext(source)[0], columns=["Date", "Ticker", "Close"],
+                       tickers=tickers, start=start, end=end)
+    frame["Ticker"] = frame["Ticker"].astype(str)
+    panel = frame.pivot_table(index="Date", columns="Ticker", values="Close", aggfunc="last").sort_index()
+    if tickers is not None:
+        panel = panel.reindex(columns=list(tickers))
+    return panel.index.to_numpy(), list(panel.columns), panel.to_numpy(dtype=float)
+
+def simple_returns(closes):
+    """Close-to-close returns against each ticker's last traded close (NaN on days without a bar)."""
+    closes = np.asarray(closes, dtype=float)
+    last = pd.DataFrame(closes).ffill().to_numpy()
+    previous = np.vstack([np.full((1, closes.shape[1]), np.nan), last[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return closes / previous - 1
+
+def synthetic_closes(n=150, days=252, seed=0):
+    """One-factor daily closes for benchmarks, with a few missing bars."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, days)
+    returns = market[:, None] * rng.uniform(0.5, 1.5, n) + rng.normal(0, 0.015, (days, n))
+    closes = 100 * np.cumprod(1 + returns, axis=0)
+    closes[rng.random(closes.shape) < 0.01] = np.nan
+    return closes
+
+# --- Strategies ---
+# Each turns a [day, ticker] close array into target weights for the same
+# shape, using only data up to that day's close. Weights decided on day t
+# are held from t's close to t + 1's close. Every bar's quantum decision is
+# drawn from the circuit's closed-form measurement distribution, so a whole
+# history is one vectorized draw instead of one simulator job per tick.
+
+def _gross_one(signal):
+    """Scales each row to gross exposure 1 (all-zero rows stay flat)."""
+    gross = np.abs(signal).sum(axis=1, keepdims=True)
+    return np.divide(signal, gross, out=np.zeros_like(signal, dtype=float), where=gross > 0)
+
+def imbalance_weights(closes, scale=100.0, seed=SEED, sampled=True):
+    """stock3.py: close-to-close imbalance -> RY angle -> BUY (long) / SELL (short).
+
+    The score clip(return * scale, -1, 1) becomes theta = (score + 1) * pi / 2
+    and RY(theta)|0> measures 1 (BUY) with P = sin^2(theta / 2).
+    sampled=False trades the expectation 2P - 1 instead of one shot.
+    """
+    returns = simple_returns(closes)
+    traded = ~np.isnan(returns)
+    scores = np.clip(np.where(traded, returns, 0.0) * scale, -1, 1)
+    p_buy = np.sin((scores + 1) * np.pi / 4) ** 2
+    if sampled:
+        signal = np.where(np.random.default_rng(seed).random(p_buy.shape) < p_buy, 1.0, -1.0)
+    else:
+        signal = 2 * p_buy - 1
+    return _gross_one(np.where(traded, signal, 0.0))
+
+def normalized_return_weights(closes, lookback=4, seed=SEED, sampled=True):
+    """stock2.py: mean return over the last bars, min-max normalized across tickers -> BUY / WAIT.
+
+    theta = normalized * pi on H + RY(theta) measures 1 with
+    P = sin^2(theta / 2 + pi / 4); BUY tickers are held long, equally weighted.
+    """
+    returns = simple_returns(closes)
+    mean = pd.DataFrame(returns).rolling(lookback, min_periods=1).mean().to_numpy()
+    low = np.min(np.where(np.isnan(mean), np.inf, mean), axis=1, keepdims=True)
+    high = np.max(np.where(np.isnan(mean), -np.inf, mean), axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = (mean - low) / (high - low)
+    # A flat cross-section has no ranking; treat every ticker as mid-range
+    normalized = np.where(np.isfinite(normalized), normalized, 0.5)
+    p_buy = np.sin(normalized * np.pi / 2 + np.pi / 4) ** 2
+    if sampled:
+        signal = (np.random.default_rng(seed).random(p_buy.shape) < p_buy).astype(float)
+    else:
+        signal = p_buy
+    return _gross_one(np.where(np.isnan(closes), 0.0, signal))
+
+def selection_weights(closes, window=21, risk_factor=0.3, budget=4, rebalance=5, solver=None):
+    """QuantFinal: mean-variance selection of `budget` assets, equally weighted.
+
+    Moments come from RollingMoments over the last `window` returns and the
+    selection is re-solved every `rebalance` bars. It uses the exact optimum
+    QAOA approximates (solve_exact while C(n, budget) <= EXACT_LIMIT, the
+    clustered solver beyond), because a QAOA run per bar would dominate the
+    backtest.
+    """
+    returns = simple_returns(closes)
+    days, n = returns.shape
+    moments = RollingMoments(range(n), window=window)
+    weights = np.zeros((days, n))
+    x = np.zeros(n)
+    for t in range(days):
+        if not np.all(np.isnan(returns[t])):
+            moments.push(t, returns[t])
+        if t >= window and (t - window) % rebalance == 0:
+            mu, sigma = moments.moments()
+            valid = np.flatnonzero(np.isfinite(mu) & np.isfinite(np.diag(sigma)) & ~np.isnan(closes[t]))
+            if len(valid) >= budget:
+                sub_mu, sub_sigma = mu[valid], np.nan_to_num(sigma[np.ix_(valid, valid)])
+                use_exact = solver == "exact" or (solver is None and comb(len(valid), budget) <= EXACT_LIMIT)
+                if use_exact:
+                    chosen = solve_exact(sub_mu, sub_sigma, risk_factor, budget).x
+                else:
+                    chosen = solve_clustered(sub_mu, sub_sigma, risk_factor, budget, max_workers=1).x
+                x = np.zeros(n)
+                x[valid] = chosen
+        weights[t] = x / budget
+    return weights
+
+STRATEGIES = {
+    "imbalance": imbalance_weights,
+    "normalized_returns": normalized_return_weights,
+    "selection": selection_weights,
+}
+
+# --- Engine ---
+
+def performance(net, turnover, periods_per_year=PERIODS_PER_YEAR):
+    equity = np.cumprod(1 + net)
+    years = len(net) / periods_per_year
+    vol = net.std(ddof=1) * np.sqrt(periods_per_year) if len(net) > 1 else 0.0
+    active = net[net != 0]
+    return {
+        "Total Return": float(equity[-1] - 1) if len(net) else 0.0,
+        "CAGR": float(equity[-1] ** (1 / years) - 1) if len(net) and equity[-1] > 0 else np.nan,
+        "Volatility": float(vol),
+        "Sharpe": float(net.mean() * periods_per_year / vol) if vol > 0 else 0.0,
+        "Max Drawdown": float(np.min(equity / np.maximum.accumulate(equity)) - 1) if len(net) else 0.0,
+        "Avg Turnover": float(turnover.mean()) if len(net) else 0.0,
+        "Hit Rate": float((active > 0).mean()) if len(active) else 0.0,
+    }
+
+def backtest(closes, weights, cost_bps=COST_BPS, periods_per_year=PERIODS_PER_YEAR):
+    """P&L of target weights over a close array, all tickers and days in a few array operations.
+
+    weights[t] is set at t's close and earns t + 1's return; moving from
+    weights[t - 1] to weights[t] costs cost_bps per unit of turnover on day t.
+    """
+    closes = np.asarray(closes, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    returns = np.nan_to_num(simple_returns(closes))
+    held = np.vstack([np.zeros((1, weights.shape[1])), weights[:-1]])
+    pnl = held * returns
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)
+    net = pnl.sum(axis=1) - turnover * cost_bps / 1e4
+    return BacktestResult(net, np.cumprod(1 + net), turnover, weights, pnl.sum(axis=0),
+                          performance(net, turnover, periods_per_year))
+
+def run(closes, strategy="imbalance", cost_bps=COST_BPS, periods_per_year=PERIODS_PER_YEAR, **params):
+    """Signals -> weights -> P&L for one strategy and parameter set."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    weights = STRATEGIES[strategy](closes, **params)
+    return backtest(closes, weights, cost_bps, periods_per_year)
+
+# --- Parameter sweeps ---
+# The close array travels once through a shared memory block that every
+# pool worker attaches to in its initializer; a task only ships its
+# parameters and gets the stats dict back.
+_worker = {}
+
+def _init_worker(shm_name, shape):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker.update(shm=shm, closes=np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+
+def _run_point(strategy, params):
+    return run(_worker["closes"], strategy, **params).stats
+
+def sweep(closes, strategy, grid, max_workers=None):
+    """Backtests every combination of grid ({param: [values]}) on a process pool.
+
+    grid may include cost_bps and periods_per_year. Returns one row per
+    combination with its stats, best Sharpe first.
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    points = [dict(zip(grid, values)) for values in product(*grid.values())]
+    workers = min(max_workers or os.cpu_count(), len(points))
+    start = time.perf_counter()
+    if workers <= 1:
+        stats = [run(closes, strategy, **params).stats for params in points]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=closes.nbytes)
+        try:
+            block = np.ndarray(closes.shape, dtype=np.float64, buffer=shm.buf)
+            block[:] = closes
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shm.name, closes.shape)) as pool:
+                stats = list(pool.map(_run_point, [strategy] * len(points), points))
+            del block
+        finally:
+            shm.close()
+            shm.unlink()
+    print(f"Sweep {strategy}: {len(points)} backtests on {workers} worker(s) "
+          f"in {time.perf_counter() - start:.2f}s")
+    table = pd.DataFrame([dict(params, **row) for params, row in zip(points, stats)])
+    return table.sort_values("Sharpe", ascending=False, ignore_index=True)
+
+# --- Checks ---
+
+def benchmark(n=150, days=252):
+    closes = synthetic_closes(n, days)
+    print(f"{n} tickers x {days} days")
+    for strategy in STRATEGIES:
+        start = time.perf_counter()
+        result = run(closes, strategy)
+        print(f"  {strategy:<20}{(time.perf_counter() - start) * 1000:>8.1f} ms   "
+              f"Sharpe {result.stats['Sharpe']:>6.2f}   return {result.stats['Total Return']:>7.2%}")
+    sweep(closes, "imbalance", {"scale": [25, 50, 100, 200], "seed": range(4), "cost_bps": [0, 10]})
+
+def report(source=DEFAULT_SOURCE):
+    dates, tickers, closes = load_closes(source)
+    print(f"{source}: {len(tickers)} tickers, {len(dates)} bars")
+    rows = {strategy: run(closes, strategy, **({"window": min(21, len(dates) // 2)}
+                                               if strategy == "selection" else {})).stats
+            for strategy in STRATEGIES}
+    print(pd.DataFrame(rows).T.to_string(float_format=lambda value: f"{value:.4f}"))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        benchmark()
+    else:
+        report(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE)
@@ -0,0 +1,259 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage, to_tree
+from scipy.spatial.distance import squareform
+
+from exact_solver import portfolio_objective, solve_exact
+
+MAX_CLUSTER = 10     # assets per subproblem (= qubits for QAOA)
+REFINE_ROUNDS = 200  # cap on 1-for-1 swap improvements after the master step
+
+ClusteredResult = namedtuple("ClusteredResult", ["x", "fval", "clusters", "allocation", "elapsed_ms"])
+
+# --- Partitioning ---
+
+def _split(indices, max_size):
+    return [indices[i:i + max_size] for i in range(0, len(indices), max_size)]
+
+def _pack(clusters, max_size):
+    """Merges neighbouring clusters (in dendrogram order) while they fit in max_size."""
+    packed = []
+    for cluster in clusters:
+        if packed and len(packed[-1]) + len(cluster) <= max_size:
+            packed[-1] = packed[-1] + cluster
+        else:
+            packed.append(list(cluster))
+    return packed
+
+def correlation_clusters(sigma, max_size=MAX_CLUSTER, indices=None):
+    """Groups of at most max_size assets from average-linkage clustering.
+
+    Distances are sqrt((1 - corr) / 2); the dendrogram is cut top-down, so a
+    branch is only split while it is still too large, and the small leftover
+    branches are then packed together with their dendrogram neighbours.
+    """
+    sigma = np.asarray(sigma, dtype=float)
+    indices = list(range(len(sigma))) if indices is None else list(indices)
+    if len(indices) <= max_size:
+        return [indices]
+    sub = sigma[np.ix_(indices, indices)]
+    std = np.sqrt(np.clip(np.diag(sub), 1e-18, None))
+    corr = np.clip(sub / np.outer(std, std), -1.0, 1.0)
+    distance = np.sqrt((1 - corr) / 2)
+    np.fill_diagonal(distance, 0.0)
+    root = to_tree(linkage(squareform(distance, checks=False), method="average"))
+
+    clusters, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        if node.get_count() <= max_size:
+            clusters.append([indices[i] for i in node.pre_order()])
+        else:
+            stack.extend((node.get_right(), node.get_left()))
+    return sorted(sorted(cluster) for cluster in _pack(clusters, max_size))
+
+def sector_clusters(tickers, sectors, sigma=None, max_size=MAX_CLUSTER):
+    """Groups tickers by sector; oversized sectors are split by correlation (or in order).
+
+    sectors maps ticker -> sector name (e.g. from the fundamentals cache);
+    unknown tickers form one "N/A" group.
+    """
+    groups = {}
+    for i, ticker in enumerate(tickers):
+        groups.setdefault(sectors.get(ticker) or "N/A", []).append(i)
+    clusters = []
+    for members in groups.values():
+        if sigma is not None:
+            clusters.extend(correlation_clusters(sigma, max_size, members))
+        else:
+            clusters.extend(_split(members, max_size))
+    return sorted(clusters)
+
+def ticker_clusters(tickers, sigma, max_size=MAX_CLUSTER, sectors=None):
+    """Sector clusters from the fundamentals cache, or correlation clusters without sectors."""
+    if sectors is None:
+        from fundamentals import default_cache
+        sectors = {ticker: info.get("sector") for ticker, info in default_cache().get_many(tickers).items()}
+    if not any(sectors.get(ticker) for ticker in tickers):
+        return correlation_clusters(sigma, max_size)
+    return sector_clusters(tickers, sectors, sigma, max_size)
+
+# --- Subproblems ---
+
+def _cluster_values_exact(mu, sigma, risk_factor, max_budget):
+    """Best in-cluster selection for every budget 0..max_budget from all 2^k subsets at once."""
+    k = len(mu)
+    masks = np.arange(2 ** k)
+    X = ((masks[:, None] >> np.arange(k)) & 1).astype(float)
+    values = risk_factor * np.einsum("ij,ij->i", X @ sigma, X) - X @ mu
+    sizes = X.sum(axis=1).astype(int)
+    best = []
+    for b in range(max_budget + 1):
+        candidates = np.flatnonzero(sizes == b)
+        i = candidates[np.argmin(values[candidates])]
+        best.append((float(values[i]), X[i]))
+    return best
+
+def _cluster_value_qaoa(mu, sigma, risk_factor, budget, maxiter):
+    # Imported here so the exact path works without the qiskit stack
+    from qiskit.primitives import StatevectorSampler as Sampler
+    from qiskit_algorithms import QAOA
+    from qiskit_algorithms.optimizers import COBYLA
+    from qiskit_finance.applications.optimization import PortfolioOptimization
+    from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
+    qp = PortfolioOptimization(
+        expected_returns=mu, covariances=sigma, risk_factor=risk_factor, budget=budget
+    ).to_quadratic_program()
+    qaoa = QAOA(sampler=Sampler(), optimizer=COBYLA(maxiter=maxiter), reps=1)
+    x = np.asarray(MinimumEigenOptimizer(qaoa).solve(qp).x, dtype=float)
+    if x.sum() != budget:
+        # Infeasible sample; fall back to the exact answer for this budget
+        x = solve_exact(mu, sigma, risk_factor, budget).x
+    return portfolio_objective(x, mu, sigma, risk_factor), x
+
+def _solve_cluster(mu, sigma, risk_factor, max_budget, solver, maxiter):
+    """[(value, x)] for budgets 0..max_budget within one cluster."""
+    if solver == "exact":
+        return _cluster_values_exact(mu, sigma, risk_factor, max_budget)
+    k = len(mu)
+    best = [(0.0, np.zeros(k))]
+    for b in range(1, max_budget + 1):
+        if b == k:
+            x = np.ones(k)
+            best.append((portfolio_objective(x, mu, sigma, risk_factor), x))
+        else:
+            best.append(_cluster_value_qaoa(mu, sigma, risk_factor, b, maxiter))
+    return best
+
+# --- Master problem ---
+
+def allocate_budget(value_curves, budget):
+    """Budget per cluster minimizing the sum of cluster values (exact DP over clusters)."""
+    INF = np.inf
+    best = np.full(budget + 1, INF)
+    best[0] = 0.0
+    choices = []
+    for curve in value_curves:
+        nxt = np.full(budget + 1, INF)
+        pick = np.zeros(budget + 1, dtype=int)
+        for used in np.flatnonzero(np.isfinite(best)):
+            for b, value in enumerate(curve[:budget - used + 1]):
+                if best[used] + value < nxt[used + b]:
+                    nxt[used + b] = best[used] + value
+                    pick[used + b] = b
+        choices.append(pick)
+        best = nxt
+    if not np.isfinite(best[budget]):
+        raise ValueError(f"budget {budget} exceeds the number of assets")
+
+    allocation, remaining = [], budget
+    for pick in reversed(choices):
+        allocation.append(int(pick[remaining]))
+        remaining -= allocation[-1]
+    return allocation[::-1]
+
+def refine(x, mu, sigma, risk_factor, rounds=REFINE_ROUNDS):
+    """Best-improvement 1-for-1 swaps on the full objective (recovers cross-cluster risk)."""
+    x = x.copy()
+    diag = np.diag(sigma)
+    for _ in range(rounds):
+        grad = 2 * risk_factor * sigma @ x - mu
+        inside, outside = np.flatnonzero(x > 0.5), np.flatnonzero(x < 0.5)
+        if len(inside) == 0 or len(outside) == 0:
+            break
+        # f(x - e_i + e_j) - f(x) for every selected i and unselected j
+        delta = (grad[outside][None, :] - grad[inside][:, None]
+                 + risk_factor * (diag[inside][:, None] + diag[outside][None, :]
+                                  - 2 * sigma[np.ix_(inside, outside)]))
+        i, j = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[i, j] >= -1e-15:
+            break
+        x[inside[i]], x[outside[j]] = 0.0, 1.0
+    return x
+
+def solve_clustered(mu, sigma, risk_factor, budget, clusters=None, max_cluster=MAX_CLUSTER,
+                    solver="exact", maxiter=50, max_workers=None, refine_swaps=True):
+    """Hierarchical portfolio selection for universes far beyond one QAOA circuit.
+
+    1. Partition the assets into clusters of at most max_cluster (sector or
+       correlation groups; correlation by default).
+    2. Solve every cluster for each budget it could receive, in parallel on
+       a process pool ("exact" enumerates all 2^k subsets, "qaoa" runs one
+       circuit per budget).
+    3. A DP master problem picks how many assets each cluster contributes.
+    4. 1-for-1 swaps on the full objective fix up cross-cluster covariance
+       that the separable master ignores.
+    """
+    start = time.perf_counter()
+    mu = np.asarray(mu, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    if clusters is None:
+        clusters = correlation_clusters(sigma, max_cluster)
+
+    tasks = [(mu[c], sigma[np.ix_(c, c)], risk_factor, min(len(c), budget), solver, maxiter)
+             for c in clusters]
+    if len(tasks) > 1 and (max_workers or os.cpu_count()) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            curves = list(pool.map(_solve_cluster, *zip(*tasks)))
+    else:
+        curves = [_solve_cluster(*task) for task in tasks]
+
+    allocation = allocate_budget([[value for value, _ in curve] for curve in curves], budget)
+    x = np.zeros(len(mu))
+    for cluster, curve, b in zip(clusters, curves, allocation):
+        x[cluster] = curve[b][1]
+    if refine_swaps:
+        x = refine(x, mu, sigma, risk_factor)
+
+    return ClusteredResult(x, portfolio_objective(x, mu, sigma, risk_factor), clusters, allocation,
+                           (time.perf_counter() - start) * 1000)
+
+# --- Checks ---
+
+def synthetic_universe(n, sectors=10, days=250, seed=0):
+    """Daily-return-like (mu, sigma, sector labels) from a one-factor-per-sector model."""
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(sectors, size=n)
+    market = rng.normal(0, 0.01, days)
+    sector_moves = rng.normal(0, 0.008, (days, sectors))
+    returns = (market[:, None] * rng.uniform(0.5, 1.5, n) + sector_moves[:, labels]
+               + rng.normal(0, 0.012, (days, n)) + rng.normal(0.0005, 0.0005, n))
+    return returns.mean(axis=0), np.cov(returns.T), labels
+
+def compare_with_exact(sizes=((12, 4), (16, 6), (20, 8)), risk_factor=0.5, max_cluster=5, seeds=(0, 1, 2)):
+    """Clustered vs exhaustive optimum on instances small enough to enumerate."""
+    print(f"{'n':>4}{'budget':>8}{'seed':>6}{'master gap':>12}{'gap':>10}{'clustered ms':>14}{'exact ms':>10}")
+    gaps = []
+    for n, budget in sizes:
+        for seed in seeds:
+            mu, sigma, _ = synthetic_universe(n, seed=seed)
+            exact = solve_exact(mu, sigma, risk_factor, budget)
+            master = solve_clustered(mu, sigma, risk_factor, budget, max_cluster=max_cluster,
+                                     max_workers=1, refine_swaps=False)
+            result = solve_clustered(mu, sigma, risk_factor, budget, max_cluster=max_cluster, max_workers=1)
+            master_gap = max((master.fval - exact.fval) / abs(exact.fval), 0.0)
+            gap = max((result.fval - exact.fval) / abs(exact.fval), 0.0)
+            gaps.append(gap)
+            print(f"{n:>4}{budget:>8}{seed:>6}{master_gap:>12.2%}{gap:>10.2%}"
+                  f"{result.elapsed_ms:>14.1f}{exact.elapsed_ms:>10.1f}")
+    print(f"Mean gap {np.mean(gaps):.2%}, worst {np.max(gaps):.2%}")
+    return gaps
+
+def benchmark(n=150, budget=15, risk_factor=0.5):
+    mu, sigma, labels = synthetic_universe(n)
+    tickers = [f"S{i}" for i in range(n)]
+    sectors = {t: f"sector-{label}" for t, label in zip(tickers, labels)}
+    for name, clusters in (("correlation", None),
+                           ("sector", sector_clusters(tickers, sectors, sigma))):
+        result = solve_clustered(mu, sigma, risk_factor, budget, clusters=clusters)
+        print(f"{name:<12} {n} assets, budget {budget}: {len(result.clusters)} clusters, "
+              f"objective {result.fval:.6f} in {result.elapsed_ms:.0f} ms")
+
+if __name__ == "__main__":
+    compare_with_exact()
+    benchmark()
@@ -1,7 +1,8 @@
 import yfinance as yf
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import pytz
+from rolling_window import RollingExtremesStore
 
 # Tickers for Gold, Silver, Crude Oil, etc.
 COMMODITIES = {
@@ -13,20 +14,38 @@ COMMODITIES = {
 
 TZ = pytz.timezone("Asia/Kolkata")
 
+EXTREMES_FILE = "Commodity_52W_State.json"
+
 def fetch_commodity_data():
     records = []
     print("Fetching Commodity Prices...")
 
+    extremes = RollingExtremesStore(EXTREMES_FILE)
+    # A year of bars seeds the 52-week window once. After that we only need
+    # the bars since the oldest last-seen day, plus a week for the previous close.
+    if all(symbol in extremes for symbol in COMMODITIES):
+        oldest = min(extremes.get(symbol).last_day for symbol in COMMODITIES)
+        window = {"start": date.fromordinal(oldest) - timedelta(days=7)}
+    else:
+        window = {"period": "1y"}
+
+    # One request for every commodity instead of one Ticker.history each
+    data = yf.download(list(COMMODITIES), group_by="ticker", auto_adjust=True,
+                       progress=False, **window)
+
     for ticker_symbol, name in COMMODITIES.items():
         try:
-            ticker = yf.Ticker(ticker_symbol)
-            # Getting 5 days of data to ensure we have a valid previous close for change calculation
-            hist = ticker.history(period="5d")
-            
+            if data.empty or ticker_symbol not in data.columns.get_level_values(0):
+                print(f"No data for {name}")
+                continue
+            hist = data[ticker_symbol].dropna(subset=["Close"])
+
             if hist.empty:
                 print(f"No data for {name}")
                 continue
-            
+
+            ext = extremes.update_from_frame(ticker_symbol, hist)
+
             current_price = hist["Close"].iloc[-1]
             prev_close = hist["Close"].iloc[-2]
             
@@ -37,6 +56,8 @@ def fetch_commodity_data():
                 "Day Change %": round(((current_price - prev_close) / prev_close) * 100, 2),
                 "Day High": round(hist["High"].iloc[-1], 2),
                 "Day Low": round(hist["Low"].iloc[-1], 2),
+                "52W High": round(ext.high, 2),
+                "52W Low": round(ext.low, 2),
                 "Last Updated": datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
             })
             print(f"Success: {name}")
@@ -44,6 +65,8 @@ def fetch_commodity_data():
         except Exception as e:
             print(f"Error fetching {name}: {e}")
 
+    extremes.save()
+
     if records:
         df = pd.DataFrame(records)
         df.to_csv("Live_Commodity_Data.csv", index=False)
@@ -1,9 +1,18 @@
 import yfinance as yf
 import pandas as pd
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, Response, jsonify, request
 from apscheduler.schedulers.background import BackgroundScheduler
+from collections import deque, namedtuple
 from datetime import datetime
+import functools
+import gzip
+import hashlib
+import json
 import threading
+import time
+from fundamentals import default_cache
+from latency import PROMETHEUS_CONTENT_TYPE, REGISTRY, timed
+from market_calendar import SessionGate
 
 app = Flask(__name__)
 
@@ -21,65 +30,320 @@ TICKERS = [
     'TITAN.NS', 'ULTRACEMCO.NS', 'UPL.NS', 'WIPRO.NS'
 ]
 
-# Global storage for live data
-live_data_store = {}
+# --- Published snapshots ---
+# merge_and_publish renders everything a route can return (JSON, HTML, their
+# gzip variants and ETags) once per refresh into an immutable Snapshot. The
+# routes only read the current pointer, so serving a request never
+# re-serializes or re-renders anything.
+Snapshot = namedtuple("Snapshot", [
+    "version", "records", "timestamp",
+    "json", "json_gzip", "json_etag",
+    "html", "html_gzip", "html_etag",
+    "sse",
+])
+
+PAGE_HTML = """
+<html>
+    <head>
+        <title>Live Nifty Portfolio</title>
+        <style>
+            table { border-collapse: collapse; width: 100%; font-family: sans-serif; }
+            th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+            tr:nth-child(even){background-color: #f2f2f2;}
+            th { background-color: #04AA6D; color: white; }
+        </style>
+    </head>
+    <body>
+        <h2>Live Nifty 50 Data (Live updates via /stream)</h2>
+        <p>Last Global Update: <span id="timestamp">{{ timestamp }}</span></p>
+        <table>
+            <tr>
+                <th>Symbol</th><th>Price</th><th>Sector</th><th>Volume</th><th>Market Cap</th><th>P/E</th><th>Updated</th>
+            </tr>
+            {% for item in portfolio %}
+            <tr id="row-{{ item.Symbol }}">
+                <td>{{ item.Symbol }}</td>
+                <td data-field="CurrentPrice">{{ item.CurrentPrice }}</td>
+                <td data-field="Sector">{{ item.Sector }}</td>
+                <td data-field="Volume">{{ "{:,}".format(item.Volume) if item.Volume != 'N/A' else 'N/A' }}</td>
+                <td data-field="MarketCap">{{ "{:,}".format(item.MarketCap) if item.MarketCap != 'N/A' else 'N/A' }}</td>
+                <td data-field="PE_Ratio">{{ item.PE_Ratio }}</td>
+                <td data-field="LastUpdated">{{ item.LastUpdated }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        <script>
+            // Only changed cells arrive; a "snapshot" event means we fell too far behind
+            const source = new EventSource("/stream?since={{ version }}");
+            const grouped = new Set(["Volume", "MarketCap"]);
+            source.addEventListener("delta", (event) => {
+                const delta = JSON.parse(event.data);
+                if (delta.removed.length) { location.reload(); return; }
+                document.getElementById("timestamp").textContent = delta.timestamp;
+                for (const [symbol, fields] of Object.entries(delta.changed)) {
+                    const row = document.getElementById("row-" + symbol);
+                    if (!row) { location.reload(); return; }
+                    for (const [field, value] of Object.entries(fields)) {
+                        const cell = row.querySelector(`[data-field="${field}"]`);
+                        if (cell) cell.textContent = grouped.has(field) && value !== "N/A" ? value.toLocaleString("en-US") : value;
+                    }
+                }
+            });
+            source.addEventListener("snapshot", () => location.reload());
+        </script>
+    </body>
+</html>
+"""
+
+PAGE_TEMPLATE = app.jinja_env.from_string(PAGE_HTML)
+
+def _etag(body):
+    return hashlib.sha1(body).hexdigest()
+
+def _json_default(value):
+    # numpy scalars from the bulk download (e.g. int64 volumes)
+    return value.item() if hasattr(value, "item") else str(value)
+
+def build_snapshot(records, version):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    json_body = json.dumps(records, default=_json_default, separators=(",", ":"), sort_keys=True).encode()
+    html_body = PAGE_TEMPLATE.render(portfolio=records, timestamp=timestamp, version=version).encode()
+    return Snapshot(
+        version=version, records=tuple(records), timestamp=timestamp,
+        json=json_body, json_gzip=gzip.compress(json_body), json_etag=_etag(json_body),
+        html=html_body, html_gzip=gzip.compress(html_body), html_etag=_etag(html_body),
+        sse=sse_frame("snapshot", version, {"timestamp": timestamp, "records": records}),
+    )
+
+# --- Delta stream ---
+# Every publish also encodes one SSE "delta" frame holding only the symbols
+# whose price, volume or fundamentals changed. The last DELTA_HISTORY frames
+# are kept so a reconnecting client (Last-Event-ID or ?since=<version>) gets
+# just what it missed; anything older falls back to a full "snapshot" frame.
+DELTA_HISTORY = 120
+DELTA_FIELDS = ("CurrentPrice", "Volume", "Sector", "MarketCap", "PE_Ratio")
+KEEPALIVE_SECONDS = 15
+
+def sse_frame(event, version, payload):
+    data = json.dumps(payload, default=_json_default, separators=(",", ":"))
+    return f"id: {version}\nevent: {event}\ndata: {data}\n\n".encode()
+
+def diff_records(old_records, new_records):
+    """{symbol: {field: value}} for symbols that are new or changed a DELTA_FIELDS value."""
+    old = {record["Symbol"]: record for record in old_records}
+    changed = {}
+    for record in new_records:
+        previous = old.get(record["Symbol"])
+        if previous is None:
+            changed[record["Symbol"]] = {k: v for k, v in record.items() if k != "Symbol"}
+            continue
+        fields = {field: record[field] for field in DELTA_FIELDS if record.get(field) != previous.get(field)}
+        if fields:
+            fields["LastUpdated"] = record["LastUpdated"]
+            changed[record["Symbol"]] = fields
+    return changed
+
 data_lock = threading.Lock()
+stream_cond = threading.Condition(data_lock)
+deltas = deque(maxlen=DELTA_HISTORY)  # (version, encoded SSE frame)
+snapshot = build_snapshot([], 0)
 
-def fetch_live_data():
-    """Background task to fetch current price, volume, and fundamentals."""
-    print(f"[{datetime.now()}] Refreshing Live Market Data...")
-    global live_data_store
-    
-    try:
-        # 1. Fetch live Price and Volume in bulk (very fast)
-        # period='1d', interval='1m' ensures we get the most recent minute's data
+def current_snapshot():
+    with data_lock:
+        return snapshot
+
+def publish(records):
+    """Builds the next snapshot and delta outside the lock, then swaps the pointer."""
+    global snapshot
+    previous = current_snapshot()
+    with timed("serialize"):
+        next_snapshot = build_snapshot(records, previous.version + 1)
+        delta = sse_frame("delta", next_snapshot.version, {
+            "timestamp": next_snapshot.timestamp,
+            "changed": diff_records(previous.records, records),
+            "removed": sorted({r["Symbol"] for r in previous.records} - {r["Symbol"] for r in records}),
+        })
+    with timed("emit"), stream_cond:
+        snapshot = next_snapshot
+        deltas.append((next_snapshot.version, delta))
+        stream_cond.notify_all()
+    return next_snapshot
+
+def pending_frames(cursor):
+    """Frames that bring a client at version `cursor` up to date (caller holds the lock)."""
+    if cursor is None or cursor > snapshot.version or not deltas or deltas[0][0] > cursor + 1:
+        return [snapshot.sse], snapshot.version
+    return [frame for version, frame in deltas if version > cursor], snapshot.version
+
+def snapshot_response(body, body_gzip, etag, mimetype):
+    """304 when the client already has this version, pre-compressed body if accepted."""
+    use_gzip = "gzip" in request.accept_encodings
+    # Each encoding is its own representation, so it gets its own validator
+    etag = f"{etag}-gz" if use_gzip else etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(body_gzip, mimetype=mimetype)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# --- Tiered refresh ---
+# Prices/volumes are cheap (one bulk download) and go stale fast, fundamentals
+# are slow (.info per symbol) and barely move. They run as separate jobs on
+# their own intervals and each one merges into the published snapshot.
+PRICE_REFRESH_SECONDS = 20
+FUNDAMENTALS_REFRESH_MINUTES = 60
+
+price_store = {}         # symbol -> (price, volume)
+fundamentals_store = {}  # symbol -> cached ticker.info fields
+merge_lock = threading.Lock()
+
+job_stats = {}
+job_stats_lock = threading.Lock()
+
+def record_run(name, elapsed_ms=None, skipped=False, failed=False, off_hours=False):
+    with job_stats_lock:
+        stats = job_stats.setdefault(name, {"runs": 0, "skipped": 0, "off_hours": 0, "errors": 0,
+                                            "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0})
+        if off_hours:
+            stats["off_hours"] += 1
+            return
+        if skipped:
+            stats["skipped"] += 1
+            return
+        stats["errors"] += failed
+        stats["runs"] += 1
+        stats["last_ms"] = round(elapsed_ms, 1)
+        stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 1)
+        stats["avg_ms"] = round(stats["avg_ms"] + (elapsed_ms - stats["avg_ms"]) / stats["runs"], 1)
+
+def timed_job(name):
+    """Overlap guard + duration metrics for a scheduled job.
+
+    A run that starts while the previous one is still going is skipped and
+    counted instead of piling up behind it.
+    """
+    def decorator(func):
+        running = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not running.acquire(blocking=False):
+                record_run(name, skipped=True)
+                print(f"[{datetime.now()}] {name} still running, skipping this run")
+                return
+            start = time.perf_counter()
+            failed = False
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                failed = True
+                print(f"{name} refresh failed: {e}")
+            finally:
+                running.release()
+                record_run(name, (time.perf_counter() - start) * 1000, failed=failed)
+        return wrapper
+    return decorator
+
+def in_session(func, name, interval_seconds, calendar=None):
+    """Market-hours gate for a scheduled job.
+
+    While NSE is open every tick runs; in the pre-open and post-close windows
+    the job runs at most every SLOW_POLL_SECONDS; while closed it does not run
+    at all and the routes keep serving the last published snapshot.
+    """
+    gate = SessionGate(interval_seconds, calendar)
+
+    @functools.wraps(func)
+    def wrapper():
+        if not gate.should_run():
+            record_run(name, off_hours=True)
+            return
+        func()
+    wrapper.gate = gate
+    return wrapper
+
+@timed_job("prices")
+def refresh_prices():
+    """Fast job: latest 1-minute bar for every symbol in one bulk download."""
+    # period='1d', interval='1m' ensures we get the most recent minute's data
+    with timed("fetch"):
         market_data = yf.download(TICKERS, period="1d", interval="1m", group_by='ticker', progress=False)
-        
+
+    prices = {}
+    for symbol in TICKERS:
+        try:
+            ticker_subset = market_data[symbol].dropna()
+            if not ticker_subset.empty:
+                prices[symbol] = (ticker_subset['Close'].iloc[-1], ticker_subset['Volume'].iloc[-1])
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+
+    price_store.update(prices)
+    merge_and_publish()
+
+@timed_job("fundamentals")
+def refresh_fundamentals():
+    """Slow job: Sector, PE, Market Cap from the shared fundamentals cache."""
+    with timed("fetch_fundamentals"):
+        fundamentals_store.update(default_cache().get_many(TICKERS))
+    print(f"Fundamentals cache: {default_cache().stats()}")
+    merge_and_publish()
+
+def merge_and_publish():
+    """Combines the latest prices and fundamentals into one published snapshot.
+
+    Both jobs call this, so it waits for the lock rather than skipping.
+    """
+    if not price_store:
+        return
+    start = time.perf_counter()
+    with merge_lock:
+        feature_start = time.perf_counter()
         new_records = []
-        
-        # We use yf.Tickers for fundamental data (Sector, PE, Market Cap)
-        # Note: In a production environment, you'd cache fundamentals longer than 2 mins
-        # but for this script, we'll fetch them together.
-        tickers_obj = yf.Tickers(" ".join(TICKERS))
-        
         for symbol in TICKERS:
-            try:
-                # Get price/volume from bulk download
-                ticker_subset = market_data[symbol].dropna()
-                current_price = ticker_subset['Close'].iloc[-1] if not ticker_subset.empty else None
-                current_volume = ticker_subset['Volume'].iloc[-1] if not ticker_subset.empty else None
-                
-                # Get info from the ticker object
-                info = tickers_obj.tickers[symbol].info
-                
-                record = {
-                    "Symbol": symbol,
-                    "CurrentPrice": round(current_price, 2) if current_price else "N/A",
-                    "Sector": info.get('sector', 'N/A'),
-                    "Volume": current_volume if current_volume else "N/A",
-                    "MarketCap": info.get('marketCap', 'N/A'),
-                    "PE_Ratio": info.get('trailingPE', 'N/A'),
-                    "LastUpdated": datetime.now().strftime("%H:%M:%S")
-                }
-                new_records.append(record)
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-
-        # Update the global store safely
-        with data_lock:
-            live_data_store = new_records
-            
-        # Also save to CSV as a backup
-        pd.DataFrame(new_records).to_csv("Live_Portfolio_Data.csv", index=False)
-        print("Live data updated successfully.")
-        
-    except Exception as e:
-        print(f"General Fetch Error: {e}")
+            current_price, current_volume = price_store.get(symbol, (None, None))
+            info = fundamentals_store.get(symbol, {})
+            new_records.append({
+                "Symbol": symbol,
+                "CurrentPrice": round(current_price, 2) if current_price else "N/A",
+                "Sector": info.get('sector', 'N/A'),
+                "Volume": current_volume if current_volume else "N/A",
+                "MarketCap": info.get('marketCap', 'N/A'),
+                "PE_Ratio": info.get('trailingPE', 'N/A'),
+                "LastUpdated": datetime.now().strftime("%H:%M:%S")
+            })
+
+        REGISTRY.observe("feature", time.perf_counter() - feature_start)
+
+        # Publish the new snapshot
+        publish(new_records)
+
+    # Also save to CSV as a backup
+    pd.DataFrame(new_records).to_csv("Live_Portfolio_Data.csv", index=False)
+    record_run("merge", (time.perf_counter() - start) * 1000)
+
+def fetch_live_data():
+    """Full refresh of fundamentals and prices (used once at startup, market open or not)."""
+    print(f"[{datetime.now()}] Refreshing Live Market Data...")
+    refresh_fundamentals()
+    refresh_prices()
+    print("Live data updated successfully.")
 
 # --- Scheduler Setup ---
 scheduler = BackgroundScheduler()
-# Run immediately once on start, then every 2 minutes
-scheduler.add_job(func=fetch_live_data, trigger="interval", minutes=2)
+# max_instances/coalesce stop APScheduler itself from queueing overlapping runs
+scheduler.add_job(func=in_session(refresh_prices, "prices", PRICE_REFRESH_SECONDS),
+                  trigger="interval", seconds=PRICE_REFRESH_SECONDS,
+                  max_instances=1, coalesce=True, id="prices")
+scheduler.add_job(func=in_session(refresh_fundamentals, "fundamentals", FUNDAMENTALS_REFRESH_MINUTES * 60),
+                  trigger="interval", minutes=FUNDAMENTALS_REFRESH_MINUTES,
+                  max_instances=1, coalesce=True, id="fundamentals")
 scheduler.start()
 
 # --- Flask Routes ---
@@ -87,55 +351,55 @@ scheduler.start()
 @app.route('/')
 def index():
     """Simple HTML view to see the data."""
-    with data_lock:
-        data = live_data_store
-    
-    # Simple table for browser viewing
-    html = """
-    <html>
-        <head>
-            <title>Live Nifty Portfolio</title>
-            <meta http-equiv="refresh" content="30"> <style>
-                table { border-collapse: collapse; width: 100%; font-family: sans-serif; }
-                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
-                tr:nth-child(even){background-color: #f2f2f2;}
-                th { background-color: #04AA6D; color: white; }
-            </style>
-        </head>
-        <body>
-            <h2>Live Nifty 50 Data (Refreshes every 2 mins)</h2>
-            <p>Last Global Update: {{ timestamp }}</p>
-            <table>
-                <tr>
-                    <th>Symbol</th><th>Price</th><th>Sector</th><th>Volume</th><th>Market Cap</th><th>P/E</th><th>Updated</th>
-                </tr>
-                {% for item in portfolio %}
-                <tr>
-                    <td>{{ item.Symbol }}</td>
-                    <td>{{ item.CurrentPrice }}</td>
-                    <td>{{ item.Sector }}</td>
-                    <td>{{ "{:,}".format(item.Volume) if item.Volume != 'N/A' else 'N/A' }}</td>
-                    <td>{{ "{:,}".format(item.MarketCap) if item.MarketCap != 'N/A' else 'N/A' }}</td>
-                    <td>{{ item.PE_Ratio }}</td>
-                    <td>{{ item.LastUpdated }}</td>
-                </tr>
-                {% endfor %}
-            </table>
-        </body>
-    </html>
-    """
-    return render_template_string(html, portfolio=data, timestamp=datetime.now().strftime("%H:%M:%S"))
+    snapshot = current_snapshot()
+    return snapshot_response(snapshot.html, snapshot.html_gzip, snapshot.html_etag, "text/html")
 
 @app.route('/api/data')
 def get_data_json():
     """API endpoint to get the live data as JSON."""
-    with data_lock:
-        return jsonify(live_data_store)
+    snapshot = current_snapshot()
+    return snapshot_response(snapshot.json, snapshot.json_gzip, snapshot.json_etag, "application/json")
+
+@app.route('/api/jobs')
+def get_job_stats():
+    """Run counts and durations of the refresh jobs."""
+    with job_stats_lock:
+        return jsonify(job_stats)
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage latency histograms in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/stream')
+def stream():
+    """Server-sent events: changed symbols only, resumable from a version cursor."""
+    cursor = request.headers.get("Last-Event-ID") or request.args.get("since")
+    cursor = int(cursor) if cursor and cursor.isdigit() else None
+
+    def events(cursor):
+        # Flushes the headers right away and sets the client's reconnect delay
+        yield b"retry: 5000\n\n"
+        while True:
+            with stream_cond:
+                if cursor == snapshot.version:
+                    stream_cond.wait(timeout=KEEPALIVE_SECONDS)
+                if cursor == snapshot.version:
+                    frames = [b": keepalive\n\n"]
+                else:
+                    frames, cursor = pending_frames(cursor)
+            # Frames are pre-encoded bytes shared by every viewer
+            yield from frames
+
+    response = Response(events(cursor), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 if __name__ == '__main__':
     # Initialize data once before starting server
     fetch_live_data()
     try:
-        app.run(debug=False, port=5000)
+        app.run(debug=False, port=5000, threaded=True)
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Defaults shared by the sync scripts. Yahoo starts throttling somewhere
+# above ~2000 requests/hour per IP, so sustained rate is kept well under that
+# while still allowing short bursts.
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 5.0      # tokens (requests) per second
+DEFAULT_BURST = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5   # seconds, doubled on every retry
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until enough tokens exist."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class FetchExecutor:
+    """Runs per-symbol fetch functions on a bounded thread pool.
+
+    Every attempt takes `cost` tokens from a shared bucket before it runs, so
+    the upstream only ever sees the configured request rate no matter how many
+    workers are busy. Failed attempts are retried with exponential backoff.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+
+    def _call(self, fn, symbol, cost):
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(cost)
+            try:
+                return symbol, fn(symbol), None
+            except Exception as e:
+                if attempt == self.retries:
+                    return symbol, None, e
+                # Jitter keeps the retries of a throttled burst from lining up again
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    def fetch_all(self, fn, symbols, cost=1):
+        """Calls fn(symbol) for every symbol.
+
+        Returns a list of (symbol, result, error) tuples in input order; error
+        is None on success and the last exception otherwise.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._call, fn, symbol, cost) for symbol in symbols]
+            return [future.result() for future in futures]
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+def default_executor():
+    """Process-wide executor, so every store and cache draws on the same rate limit."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = FetchExecutor()
+        return _default_executor
+
+class FakeProvider:
+    """Offline stand-in for yfinance with injected latency and failures."""
+
+    def __init__(self, latency=0.2, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def fetch(self, symbol):
+        with self.lock:
+            self.calls += 1
+            fail = self.random.random() < self.fail_rate
+        time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"Injected failure for {symbol}")
+        return {"symbol": symbol, "close": 100.0}
+
+def benchmark(n_symbols=150, latency=0.2, sleep=0.2, workers=DEFAULT_WORKERS,
+              rate=DEFAULT_RATE * 4, burst=DEFAULT_BURST):
+    """Compares the old serial fetch+sleep loop with the executor, offline."""
+    symbols = [f"SYM{i}.NS" for i in range(n_symbols)]
+
+    serial_estimate = n_symbols * (latency + sleep)
+
+    provider = FakeProvider(latency=latency)
+    executor = FetchExecutor(max_workers=workers, rate=rate, burst=burst, retries=0)
+    start = time.perf_counter()
+    results = executor.fetch_all(provider.fetch, symbols)
+    elapsed = time.perf_counter() - start
+
+    ok = sum(1 for _, _, error in results if error is None)
+    print(f"Symbols:            {n_symbols} ({ok} ok)")
+    print(f"Serial + sleep:     {serial_estimate:.2f}s (latency {latency}s + sleep {sleep}s each)")
+    print(f"Executor:           {elapsed:.2f}s ({workers} workers, {rate}/s, burst {burst})")
+    print(f"Rate-limit floor:   {max(0, n_symbols - burst) / rate:.2f}s")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+from fetcher import default_executor
+
+CACHE_FILE = "Fundamentals_Cache.json"
+MAX_ENTRIES = 1000
+
+# Per-field freshness. Names and sectors practically never change, market
+# cap and PE move with the price but we only report them daily.
+DAY = 24 * 60 * 60
+FIELD_TTLS = {
+    "longName": 7 * DAY,
+    "sector": 7 * DAY,
+    "marketCap": DAY,
+    "trailingPE": DAY,
+}
+
+# Expired values younger than ttl * STALE_FACTOR are still served while a
+# background refresh runs; older ones block on a fresh fetch.
+STALE_FACTOR = 3
+
+def fetch_info(symbol):
+    return yf.Ticker(symbol).info
+
+class FundamentalsCache:
+    """In-memory LRU of ticker.info fields, persisted to a JSON file.
+
+    Every field is stored with the time it was fetched, so each can expire on
+    its own TTL. Lookups return plain dicts, which keeps the existing
+    info.get('sector', 'N/A') call sites unchanged.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES, field_ttls=None,
+                 fetcher=fetch_info, executor=None, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.field_ttls = dict(FIELD_TTLS if field_ttls is None else field_ttls)
+        self.fetcher = fetcher
+        self.executor = executor or default_executor()
+        self.clock = clock
+
+        self.entries = OrderedDict()  # symbol -> {field: [value, fetched_at]}
+        self.lock = threading.RLock()
+        self.refreshing = set()
+        self.refresher = ThreadPoolExecutor(max_workers=2)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable fundamentals cache {self.path}: {e}")
+            return
+        with self.lock:
+            for symbol, fields in stored.items():
+                self.entries[symbol] = fields
+            self._evict()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _status(self, fields):
+        """Returns 'fresh', 'stale' or 'expired' for a cached entry."""
+        now = self.clock()
+        status = "fresh"
+        for field, ttl in self.field_ttls.items():
+            if field not in fields:
+                return "expired"
+            age = now - fields[field][1]
+            if age > ttl * STALE_FACTOR:
+                return "expired"
+            if age > ttl:
+                status = "stale"
+        return status
+
+    def _store(self, symbol, info):
+        now = self.clock()
+        with self.lock:
+            fields = self.entries.get(symbol, {})
+            for field in self.field_ttls:
+                if field in info:
+                    fields[field] = [info[field], now]
+                else:
+                    # Keep the miss cached too, otherwise symbols without a PE
+                    # would be refetched on every call
+                    fields[field] = [None, now]
+            self.entries[symbol] = fields
+            self.entries.move_to_end(symbol)
+            view = self._view(symbol)
+            self._evict()
+            return view
+
+    def _view(self, symbol):
+        fields = self.entries[symbol]
+        return {field: value for field, (value, _) in fields.items() if value is not None}
+
+    def _refresh(self, symbol):
+        try:
+            self.executor.limiter.acquire()
+            self._store(symbol, self.fetcher(symbol))
+            self.save()
+        except Exception as e:
+            print(f"Background refresh failed for {symbol}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(symbol)
+
+    def _lookup(self, symbol):
+        """Returns the cached view, or None when the caller must fetch."""
+        with self.lock:
+            fields = self.entries.get(symbol)
+            status = "expired" if fields is None else self._status(fields)
+            if status == "expired":
+                self.misses += 1
+                return None
+            self.entries.move_to_end(symbol)
+            if status == "fresh":
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if symbol not in self.refreshing:
+                    self.refreshing.add(symbol)
+                    self.refreshes += 1
+                    self.refresher.submit(self._refresh, symbol)
+            return self._view(symbol)
+
+    def get(self, symbol):
+        """Cached ticker.info fields for one symbol, fetching on a miss."""
+        return self.get_many([symbol])[symbol]
+
+    def get_many(self, symbols):
+        """Batch lookup. Misses are fetched concurrently through the executor.
+
+        Returns {symbol: info}; symbols whose fetch failed map to an empty dict
+        so callers fall back to their usual defaults.
+        """
+        result = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            view = self._lookup(symbol)
+            if view is None:
+                missing.append(symbol)
+            else:
+                result[symbol] = view
+
+        if missing:
+            for symbol, info, error in self.executor.fetch_all(self.fetcher, missing):
+                if error is not None:
+                    print(f"Fundamentals fetch failed for {symbol}: {error}")
+                    result[symbol] = {}
+                    continue
+                result[symbol] = self._store(symbol, info)
+            self.save()
+
+        return result
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def default_cache():
+    """Process-wide cache shared by the sync scripts and the Flask server."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FundamentalsCache()
+        return _default_cache
@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pandas as pd
+import pytz
+import yfinance as yf
+from fetcher import default_executor
+from market_calendar import default_calendar
+
+STORE_DIR = "History_Store"
+MANIFEST = "manifest.json"
+TZ = pytz.timezone("Asia/Kolkata")
+
+PERIOD_UNITS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+BACKFILL_SLACK = timedelta(days=7)
+LIVE_TTL = timedelta(seconds=30)  # reuse of a sync while the current bar is still moving
+LOCK_STALE_SECONDS = 30  # a manifest lock older than this was left by a dead process
+
+def period_to_timedelta(period):
+    """'5d', '1mo', '6mo', '12mo', '1y' -> timedelta (months are 30 days)."""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    return timedelta(days=int(match.group(1)) * PERIOD_UNITS[match.group(2)])
+
+@contextmanager
+def _file_lock(path):
+    """Cross-process lock held by creating path exclusively (works on Windows too)."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+def _synced(entry):
+    return pd.Timestamp(entry.get("synced", "1970-01-01T00:00:00+00:00"))
+
+def fetch_history(symbol, interval="1d", start=None, period=None):
+    ticker = yf.Ticker(symbol)
+    if start is None:
+        return ticker.history(period=period, interval=interval, actions=True)
+    return ticker.history(start=start, interval=interval, actions=True)
+
+class HistoryStore:
+    """Append-only local OHLCV store keyed by (symbol, interval).
+
+    Bars live in one CSV per key under STORE_DIR/<interval>/. The manifest
+    records the last stored timestamp and the index timezone of every key, so
+    a sync only asks upstream for bars from the last stored one onwards. That
+    last bar is re-fetched and upserted because Yahoo keeps revising the
+    current session's bar until the close. A key is not fetched again until
+    upstream can have changed it (see _fresh), so callers that poll faster
+    than that (QuantFinal every ~10 s) read from disk.
+    """
+
+    def __init__(self, root=STORE_DIR, fetcher=fetch_history, executor=None, calendar=None):
+        self.root = root
+        self.fetcher = fetcher
+        self.executor = executor or default_executor()
+        self.calendar = calendar or default_calendar()
+        self.lock = threading.Lock()
+        self.manifest = self._read_manifest()
+
+    @staticmethod
+    def _key(symbol, interval):
+        return f"{symbol}|{interval}"
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, interval, f"{symbol.replace('/', '_')}.csv")
+
+    def _read_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        """Writes the manifest merged with what other processes saved since it was read.
+
+        For a key present in both, the more recently synced entry wins.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        with _file_lock(f"{path}.lock"):
+            for key, entry in self._read_manifest().items():
+                ours = self.manifest.get(key)
+                if ours is None or _synced(entry) > _synced(ours):
+                    self.manifest[key] = entry
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+
+    def last_timestamp(self, symbol, interval="1d"):
+        entry = self.manifest.get(self._key(symbol, interval))
+        if entry is None:
+            return None
+        return pd.Timestamp(entry["last"]).tz_convert(entry["tz"])
+
+    def _load(self, symbol, interval):
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        # The CSV is the source of truth; the entry may be missing if another
+        # process stored the key after this one read the manifest
+        entry = self.manifest.get(self._key(symbol, interval))
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(entry["tz"] if entry else TZ)
+        df.index.name = "Date" if interval.endswith(("d", "wk", "mo")) else "Datetime"
+        return df
+
+    def _mark_synced(self, symbol, interval):
+        # caller holds the lock
+        entry = self.manifest.get(self._key(symbol, interval))
+        if entry is not None:
+            entry["synced"] = self.calendar.now().isoformat()
+
+    def upsert(self, symbol, interval, bars, save_manifest=True):
+        """Merges bars into the store; rows with an existing timestamp replace it.
+
+        The CSV is only rewritten when the merge changed something.
+        """
+        with self.lock:
+            if bars is None or bars.empty:
+                self._mark_synced(symbol, interval)
+            else:
+                stored = self._load(symbol, interval)
+                if stored.empty:
+                    merged = bars
+                else:
+                    merged = pd.concat([stored, bars.tz_convert(stored.index.tz)])
+                    merged = merged[~merged.index.duplicated(keep="last")]
+                merged = merged.sort_index()
+
+                if stored.empty or not merged.equals(stored):
+                    path = self._path(symbol, interval)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp = f"{path}.tmp"
+                    merged.to_csv(tmp)
+                    os.replace(tmp, path)
+
+                self.manifest[self._key(symbol, interval)] = {
+                    "first": merged.index[0].isoformat(),
+                    "last": merged.index[-1].isoformat(),
+                    "tz": str(merged.index.tz),
+                    "rows": len(merged),
+                    "synced": self.calendar.now().isoformat(),
+                }
+            if save_manifest:
+                self._save_manifest()
+
+    def _fresh(self, symbol, interval):
+        """True if upstream cannot have changed the key since it was last synced.
+
+        While the market is open the current bar keeps moving, so a sync is
+        reused for LIVE_TTL only. Otherwise the key is fresh once it was
+        synced after the latest session closed, i.e. it holds that session's
+        final bar.
+        """
+        entry = self.manifest.get(self._key(symbol, interval))
+        if entry is None or "synced" not in entry:
+            return False
+        now = self.calendar.now()
+        synced = pd.Timestamp(entry["synced"])
+        if self.calendar.is_open(now):
+            return now - synced < LIVE_TTL
+        return synced >= self.calendar.last_close(now)
+
+    def _covers(self, symbol, interval, period):
+        entry = self.manifest.get(self._key(symbol, interval))
+        needed = self.calendar.now() - period_to_timedelta(period)
+        # A week of slack for weekends and exchange holidays at the window start
+        return pd.Timestamp(entry["first"]) <= needed + BACKFILL_SLACK
+
+    def sync(self, symbol, interval="1d", period="6mo", save_manifest=True):
+        """Fetches only the bars after the last stored one. Returns the row count fetched.
+
+        A key that does not reach back far enough for `period` is backfilled
+        with a full period request; upsert() de-duplicates the overlap. A key
+        that is already covered and still fresh is skipped without a request.
+        """
+        last = self.last_timestamp(symbol, interval)
+        if last is None or not self._covers(symbol, interval, period):
+            bars = self.fetcher(symbol, interval=interval, period=period)
+        elif self._fresh(symbol, interval):
+            return 0
+        else:
+            bars = self.fetcher(symbol, interval=interval, start=last)
+        self.upsert(symbol, interval, bars, save_manifest=save_manifest)
+        return 0 if bars is None else len(bars)
+
+    def sync_many(self, symbols, interval="1d", period="6mo"):
+        """Concurrent sync through the shared executor; failures are printed and skipped.
+
+        Fresh symbols are not submitted at all,
+        and the manifest is written once for the whole batch.
+        """
+        fetched = 0
+        symbols = list(dict.fromkeys(symbols))
+        stale = [s for s in symbols if not (self._fresh(s, interval) and self._covers(s, interval, period))]
+        if not stale:
+            return 0
+        for symbol, rows, error in self.executor.fetch_all(
+                lambda s: self.sync(s, interval=interval, period=period, save_manifest=False), stale):
+            if error is not None:
+                print(f"History sync failed for {symbol}: {error}")
+                continue
+            fetched += rows
+        with self.lock:
+            self._save_manifest()
+        print(f"History sync: {fetched} bars fetched for {len(stale)} of {len(symbols)} symbols ({interval})")
+        return fetched
+
+    def read(self, symbol, interval="1d", start=None, end=None, columns=None):
+        """Stored bars for [start, end] as a DataFrame (empty if nothing is stored)."""
+        df = self._load(symbol, interval)
+        if df.empty:
+            return df
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index <= end]
+        if columns is not None:
+            df = df[columns]
+        return df
+
+    def history(self, symbol, period="6mo", interval="1d", sync=True):
+        """Drop-in for Ticker.history(period=...): sync the delta, read the window."""
+        if sync:
+            self.sync(symbol, interval=interval, period=period)
+        return self.read(symbol, interval, start=self.calendar.now() - period_to_timedelta(period))
+
+    def close_panel(self, symbols, period="1mo", interval="1d", sync=True):
+        """Drop-in for yf.download(symbols, ...)['Close']: one column per symbol."""
+        if sync:
+            self.sync_many(symbols, interval=interval, period=period)
+        start = self.calendar.now() - period_to_timedelta(period)
+        closes = {}
+        for symbol in symbols:
+            df = self.read(symbol, interval, start=start)
+            if not df.empty:
+                closes[symbol] = df["Close"]
+        return pd.DataFrame(closes)
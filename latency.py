@@ -0,0 +1,134 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Pipeline stages every signal engine reports. Engines may record others;
+# these just always show up on /metrics, even before their first sample.
+STAGES = ("fetch", "feature", "decision", "serialize", "emit")
+QUANTILES = (0.5, 0.99)
+
+# Log-linear buckets over integer microseconds (HDR-style): exact below
+# 2 * SUB_BUCKETS, then SUB_BUCKETS buckets per power of two, i.e. ~3%
+# relative error up to MAX_MICROS (about an hour).
+SUB_BUCKETS = 32
+MAX_MICROS = 2 ** 32 - 1
+_SHIFT = SUB_BUCKETS.bit_length()  # keeps the top 6 bits of a value
+N_BUCKETS = (MAX_MICROS.bit_length() - _SHIFT + 1) * SUB_BUCKETS + SUB_BUCKETS
+
+def _bucket(micros):
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    exponent = micros.bit_length() - _SHIFT
+    return exponent * SUB_BUCKETS + (micros >> exponent)
+
+def _bucket_ceiling(index):
+    """Largest value that lands in bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    exponent = index // SUB_BUCKETS - 1
+    mantissa = index - exponent * SUB_BUCKETS
+    return ((mantissa + 1) << exponent) - 1
+
+class LatencyHistogram:
+    """Fixed-size latency histogram; record() is a bucket increment under a lock."""
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        micros = min(max(int(seconds * 1e6), 0), MAX_MICROS)
+        index = _bucket(micros)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += micros
+            if micros > self.max:
+                self.max = micros
+
+    def percentile(self, q):
+        """q-quantile in seconds (0 when empty)."""
+        with self.lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if count == 0:
+            return 0.0
+        rank = max(1, round(q * count))
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_ceiling(index), largest) / 1e6
+        return largest / 1e6
+
+    def summary(self):
+        with self.lock:
+            count, total, largest = self.count, self.total, self.max
+        return {
+            "count": count,
+            "sum": total / 1e6,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": largest / 1e6,
+        }
+
+class LatencyRegistry:
+    """Per-stage histograms for one process, rendered in Prometheus text format."""
+
+    def __init__(self, prefix="signal_stage_latency", stages=STAGES):
+        self.prefix = prefix
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).record(seconds)
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in list(self.histograms.items())}
+
+    def report(self):
+        """One line per stage with samples, for the console engines."""
+        return " | ".join(
+            f"{stage} p50 {s['p50'] * 1e3:.1f}ms p99 {s['p99'] * 1e3:.1f}ms max {s['max'] * 1e3:.1f}ms"
+            for stage, s in self.summary().items() if s["count"])
+
+    def render(self):
+        """Prometheus exposition: a summary (p50/p99, sum, count) plus a max gauge."""
+        name = f"{self.prefix}_seconds"
+        lines = [f"# HELP {name} Latency of each signal pipeline stage.", f"# TYPE {name} summary"]
+        maxima = [f"# HELP {name}_max Slowest observed sample of each stage.", f"# TYPE {name}_max gauge"]
+        for stage, histogram in list(self.histograms.items()):
+            s = histogram.summary()
+            for q in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {histogram.percentile(q):.6f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {s["count"]}')
+            maxima.append(f'{name}_max{{stage="{stage}"}} {s["max"]:.6f}')
+        return "\n".join(lines + maxima) + "\n"
+
+# Process-wide registry; each engine runs in its own process
+REGISTRY = LatencyRegistry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def observe(stage, seconds):
+    REGISTRY.observe(stage, seconds)
+
+def timed(stage):
+    return REGISTRY.timed(stage)
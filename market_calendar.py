@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+TZ = pytz.timezone("Asia/Kolkata")
+
+# Regular NSE equity session; pre-open and post-close windows around it are
+# polled at the slow cadence, everything else is "closed".
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+PRE_OPEN = timedelta(minutes=15)     # 09:00-09:15
+POST_CLOSE = timedelta(minutes=30)   # 15:30-16:00
+SLOW_POLL_SECONDS = 300
+
+# PORTFOLIO_NSE_HOLIDAYS points at a JSON list of "YYYY-MM-DD" exchange
+# holidays (weekends are always closed). A missing file means weekends only.
+HOLIDAYS_FILE = os.environ.get("PORTFOLIO_NSE_HOLIDAYS", "NSE_Holidays.json")
+
+OPEN, PRE_OPEN_PHASE, POST_CLOSE_PHASE, CLOSED = "open", "pre_open", "post_close", "closed"
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+def load_holidays(path=HOLIDAYS_FILE):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {_as_date(day) for day in json.load(f)}
+
+def system_clock():
+    return datetime.now(TZ)
+
+class FakeClock:
+    """Injectable clock for exercising the calendar without waiting for 09:15."""
+
+    def __init__(self, start):
+        self.now = TZ.localize(start) if start.tzinfo is None else start.astimezone(TZ)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+        return self.now
+
+class MarketCalendar:
+    """Asia/Kolkata trading calendar the polling loops consult before fetching.
+
+    phase() says whether the market is open, in the pre-open/post-close
+    windows or closed; poll_interval() turns a loop's normal cadence into
+    the delay it should actually wait (fast while open, SLOW_POLL_SECONDS
+    around the session, and straight through to the next pre-open while
+    closed).
+    """
+
+    def __init__(self, holidays=None, clock=system_clock, session_open=SESSION_OPEN,
+                 session_close=SESSION_CLOSE, pre_open=PRE_OPEN, post_close=POST_CLOSE):
+        self.holidays = load_holidays() if holidays is None else {_as_date(day) for day in holidays}
+        self.clock = clock
+        self.session_open = session_open
+        self.session_close = session_close
+        self.pre_open = pre_open
+        self.post_close = post_close
+
+    def now(self):
+        return self.clock().astimezone(TZ)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def _bounds(self, day):
+        opens = TZ.localize(datetime.combine(day, self.session_open))
+        closes = TZ.localize(datetime.combine(day, self.session_close))
+        return opens, closes
+
+    def phase(self, now=None):
+        now = self.now() if now is None else now.astimezone(TZ)
+        if not self.is_trading_day(now.date()):
+            return CLOSED
+        opens, closes = self._bounds(now.date())
+        if opens <= now < closes:
+            return OPEN
+        if opens - self.pre_open <= now < opens:
+            return PRE_OPEN_PHASE
+        if closes <= now < closes + self.post_close:
+            return POST_CLOSE_PHASE
+        return CLOSED
+
+    def is_open(self, now=None):
+        return self.phase(now) == OPEN
+
+    def is_active(self, now=None):
+        """Open or in the pre-open/post-close windows, i.e. worth polling at all."""
+        return self.phase(now) != CLOSED
+
+    def next_open(self, now=None):
+        """Start of the next regular session (today's if it has not opened yet)."""
+        now = self.now() if now is None else now.astimezone(TZ)
+        day = now.date()
+        for _ in range(366):
+            if self.is_trading_day(day):
+                opens, _ = self._bounds(day)
+                if opens > now:
+                    return opens
+            day += timedelta(days=1)
+        raise ValueError("No trading day within a year; check the holiday list")
+
+    def last_close(self, now=None):
+        """End of the most recent regular session that has closed by now."""
+        now = self.now() if now is None else now.astimezone(TZ)
+        day = now.date()
+        for _ in range(366):
+            if self.is_trading_day(day):
+                _, closes = self._bounds(day)
+                if closes <= now:
+                    return closes
+            day -= timedelta(days=1)
+        raise ValueError("No trading day within a year; check the holiday list")
+
+    def poll_interval(self, fast, slow=SLOW_POLL_SECONDS, now=None):
+        """Seconds a loop with cadence `fast` should wait before its next poll."""
+        now = self.now() if now is None else now.astimezone(TZ)
+        phase = self.phase(now)
+        if phase == OPEN:
+            return fast
+        if phase in (PRE_OPEN_PHASE, POST_CLOSE_PHASE):
+            until_open = (self._bounds(now.date())[0] - now).total_seconds()
+            if until_open > 0:
+                # Pre-open: never sleep past the bell
+                return max(fast, min(slow, until_open))
+            return max(fast, slow)
+        wake = self.next_open(now) - self.pre_open
+        return max(fast, (wake - now).total_seconds())
+
+    def describe(self, now=None):
+        now = self.now() if now is None else now.astimezone(TZ)
+        phase = self.phase(now)
+        if phase == OPEN:
+            return f"market open until {self.session_close:%H:%M} IST"
+        return f"market {phase.replace('_', '-')}, next session {self.next_open(now):%a %d %b %H:%M} IST"
+
+class SessionGate:
+    """Whether a job on a fixed `interval_seconds` schedule should run on this tick.
+
+    Every tick runs while the market is open, at most one per
+    SLOW_POLL_SECONDS in the pre-open and post-close windows, and none while
+    closed. Used by currentflask.in_session for its APScheduler jobs.
+    """
+
+    def __init__(self, interval_seconds, calendar=None, slow=SLOW_POLL_SECONDS):
+        self.calendar = calendar or default_calendar()
+        self.slow_seconds = max(interval_seconds, slow)
+        self.last_run = None
+        self.lock = threading.Lock()
+
+    def should_run(self):
+        now = self.calendar.now()
+        with self.lock:
+            if not self.calendar.is_open(now):
+                if not self.calendar.is_active(now):
+                    return False
+                if self.last_run is not None and (now - self.last_run).total_seconds() < self.slow_seconds:
+                    return False
+            self.last_run = now
+            return True
+
+_default_calendar = None
+_default_lock = threading.Lock()
+
+def default_calendar():
+    """Process-wide calendar on the system clock, holidays from PORTFOLIO_NSE_HOLIDAYS."""
+    global _default_calendar
+    with _default_lock:
+        if _default_calendar is None:
+            _default_calendar = MarketCalendar()
+        return _default_calendar
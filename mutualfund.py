@@ -1,7 +1,15 @@
+import codecs
+import json
+import os
+import threading
 import requests
 import pandas as pd
 from datetime import datetime
 import pytz
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fetcher import FetchExecutor
+from nav_store import MFAPI_DATE_FORMAT, NAVStore, nav_analytics
 
 # Scheme Codes for popular funds (Reliable for Indian MFs)
 # You can find any fund's code at https://www.mfapi.in/
@@ -16,39 +24,152 @@ MF_SCHEMES = {
 
 TZ = pytz.timezone("Asia/Kolkata")
 
-def fetch_mf_data():
+MFAPI_BASE_URL = os.environ.get("MFAPI_BASE_URL", "https://api.mfapi.in")
+TIMEOUT = (5, 15)  # connect, read (seconds)
+MAX_CONCURRENCY = 16
+CHUNK_SIZE = 4096
+
+_local = threading.local()
+
+def get_session():
+    """One keep-alive Session per worker thread, with transport-level retries."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+def _skip(buf, pos, chars=" \t\r\n"):
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+def parse_latest_navs(chunks, n=2, until=None):
+    """Incrementally parses an mfapi response body and stops after n NAV rows.
+
+    Each scheme's response carries its whole NAV history (newest first), so
+    rather than json-loading megabytes we decode the "meta" object and the
+    first n entries of "data" as soon as they are in the buffer. With `until`,
+    decoding continues past n until until(row) is true for the latest row.
+    Returns (meta, navs); meta is None if the body had none.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    meta = None
+    data_pos = None
+    data_done = False
+    navs = []
+
+    def enough():
+        return len(navs) >= n and (until is None or until(navs[-1]))
+
+    for chunk in chunks:
+        buf += chunk
+
+        if meta is None:
+            i = buf.find('"meta"')
+            j = buf.find(":", i) if i >= 0 else -1
+            if j >= 0:
+                try:
+                    meta, _ = decoder.raw_decode(buf, _skip(buf, j + 1))
+                except json.JSONDecodeError:
+                    pass  # object not complete yet
+
+        if data_pos is None:
+            i = buf.find('"data"')
+            j = buf.find("[", i) if i >= 0 else -1
+            if j >= 0:
+                data_pos = j + 1
+
+        while data_pos is not None and not data_done and not enough():
+            data_pos = _skip(buf, data_pos, " \t\r\n,")
+            if data_pos >= len(buf):
+                break
+            if buf[data_pos] == "]":
+                data_done = True
+                break
+            try:
+                row, data_pos = decoder.raw_decode(buf, data_pos)
+            except json.JSONDecodeError:
+                break  # row not complete yet
+            navs.append(row)
+
+        if data_pos:
+            # Drop the decoded prefix so a full-history read stays linear
+            buf = buf[data_pos:]
+            data_pos = 0
+
+        if meta is not None and (data_done or enough()):
+            break
+
+    return meta, navs
+
+def fetch_latest_navs(code, n=2, until=None):
+    """Streams /mf/<code> and returns (meta, latest n NAV rows) without reading the rest."""
+    url = f"{MFAPI_BASE_URL}/mf/{code}"
+    with get_session().get(url, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chunks = (decoder.decode(block) for block in response.iter_content(chunk_size=CHUNK_SIZE))
+        return parse_latest_navs(chunks, n=n, until=until)
+
+def fetch_navs_since(code, since=None, n=2):
+    """NAV rows published after `since` (plus the boundary row, and at least n).
+
+    since=None streams the full history, which happens once per scheme before
+    the NAV store has anything for it.
+    """
+    if since is None:
+        until = lambda row: False
+    else:
+        until = lambda row: datetime.strptime(row["date"], MFAPI_DATE_FORMAT) <= since
+    return fetch_latest_navs(code, n=n, until=until)
+
+def fetch_mf_data(schemes=MF_SCHEMES):
     records = []
     print("Fetching Mutual Fund NAVs...")
 
-    for code, name in MF_SCHEMES.items():
-        try:
-            # API call to get latest NAV
-            url = f"https://api.mfapi.in/mf/{code}"
-            response = requests.get(url).json()
-            
-            if "data" in response and len(response["data"]) > 0:
-                current_nav = float(response["data"][0]["nav"])
-                prev_nav = float(response["data"][1]["nav"]) if len(response["data"]) > 1 else current_nav
-                
-                day_change = ((current_nav - prev_nav) / prev_nav) * 100
-                
-                records.append({
-                    "Fund Name": name,
-                    "Scheme Code": code,
-                    "Current NAV": current_nav,
-                    "Day Change %": round(day_change, 2),
-                    "Category": response["meta"].get("scheme_category", "N/A"),
-                    "Last Updated": response["data"][0]["date"]
-                })
-                print(f"Success: {name}")
-            else:
-                print(f"No data for {name}")
-
-        except Exception as e:
-            print(f"Error fetching {name}: {e}")
+    store = NAVStore()
+    # Retries live in the session's urllib3 Retry; a second layer here would multiply them
+    executor = FetchExecutor(max_workers=MAX_CONCURRENCY, rate=20, burst=MAX_CONCURRENCY, retries=0)
+    results = executor.fetch_all(lambda code: fetch_navs_since(code, store.last_date(code)), list(schemes))
+
+    for code, result, error in results:
+        name = schemes[code]
+        if error is not None:
+            print(f"Error fetching {name}: {error}")
+            continue
+
+        meta, navs = result
+        store.merge(code, navs)
+        if navs:
+            current_nav = float(navs[0]["nav"])
+            prev_nav = float(navs[1]["nav"]) if len(navs) > 1 else current_nav
+
+            day_change = ((current_nav - prev_nav) / prev_nav) * 100
+
+            records.append({
+                "Fund Name": name,
+                "Scheme Code": code,
+                "Current NAV": current_nav,
+                "Day Change %": round(day_change, 2),
+                "Category": (meta or {}).get("scheme_category", "N/A"),
+                "Last Updated": navs[0]["date"]
+            })
+            print(f"Success: {name}")
+        else:
+            print(f"No data for {name}")
 
     if records:
         df = pd.DataFrame(records)
+        # Return/risk columns from the stored NAV history, all schemes at once
+        analytics = nav_analytics(store.panel(df["Scheme Code"]))
+        df = df.merge(analytics, left_on="Scheme Code", right_index=True, how="left")
         df.to_csv("Live_Mutual_Fund_Data.csv", index=False)
         print("\nSaved: Live_Mutual_Fund_Data.csv")
 
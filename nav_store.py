@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = "NAV_Store"
+MANIFEST = "manifest.json"
+MFAPI_DATE_FORMAT = "%d-%m-%Y"
+
+TRADING_DAYS = 252
+VOL_WINDOW = 63  # ~3 months of NAVs for the rolling volatility
+HORIZONS = {
+    "1W": 7,
+    "1M": 30,
+    "3M": 91,
+    "1Y": 365,
+    "3Y": 3 * 365,
+}
+
+def parse_nav_rows(rows):
+    """mfapi {"date": "dd-mm-yyyy", "nav": "..."} rows -> Date-indexed NAV series.
+
+    This is the only place the dd-mm-yyyy strings are parsed; everything
+    stored and analysed downstream uses datetime64 dates.
+    """
+    if not rows:
+        return pd.Series(dtype="float64", name="NAV", index=pd.DatetimeIndex([], name="Date"))
+    dates = pd.to_datetime([row["date"] for row in rows], format=MFAPI_DATE_FORMAT)
+    navs = pd.to_numeric(pd.Series([row["nav"] for row in rows]), errors="coerce").to_numpy()
+    series = pd.Series(navs, index=pd.DatetimeIndex(dates, name="Date"), name="NAV")
+    return series[~series.index.duplicated(keep="first")].sort_index().dropna()
+
+class NAVStore:
+    """Per-scheme NAV history on disk (NAV_Store/<code>.csv) with incremental merge."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        self.manifest = {}
+        path = os.path.join(root, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+
+    def _path(self, code):
+        return os.path.join(self.root, f"{code}.csv")
+
+    def last_date(self, code):
+        entry = self.manifest.get(str(code))
+        return None if entry is None else pd.Timestamp(entry["last"])
+
+    def read(self, code):
+        path = self._path(code)
+        if not os.path.exists(path):
+            return pd.Series(dtype="float64", name="NAV", index=pd.DatetimeIndex([], name="Date"))
+        df = pd.read_csv(path, parse_dates=["Date"], date_format="%Y-%m-%d")
+        return df.set_index("Date")["NAV"]
+
+    def merge(self, code, rows):
+        """Upserts freshly fetched mfapi rows; returns the number of new dates."""
+        fresh = parse_nav_rows(rows)
+        if fresh.empty:
+            return 0
+        with self.lock:
+            stored = self.read(code)
+            added = len(fresh.index.difference(stored.index))
+            merged = pd.concat([stored, fresh])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{self._path(code)}.tmp"
+            merged.to_frame().to_csv(tmp, date_format="%Y-%m-%d")
+            os.replace(tmp, self._path(code))
+
+            self.manifest[str(code)] = {
+                "first": merged.index[0].strftime("%Y-%m-%d"),
+                "last": merged.index[-1].strftime("%Y-%m-%d"),
+                "rows": len(merged),
+            }
+            path = os.path.join(self.root, MANIFEST)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(f"{path}.tmp", path)
+        return added
+
+    def panel(self, codes):
+        """Date x scheme NAV matrix on the union calendar (NaN where not published)."""
+        return pd.DataFrame({str(code): self.read(code) for code in codes}).sort_index()
+
+def nav_analytics(panel):
+    """Return/risk metrics for every scheme in one batched NumPy pass.
+
+    panel is a Date x scheme NAV frame (see NAVStore.panel). Gaps from
+    scheme-specific holidays are forward filled so every column shares one
+    calendar; the look-back NAV for a horizon is the last NAV published on or
+    before (latest date - horizon).
+    """
+    if panel.empty:
+        return pd.DataFrame(index=pd.Index(panel.columns, name="Scheme Code"))
+
+    dates = panel.index.to_numpy(dtype="datetime64[D]")
+    raw = panel.to_numpy(dtype="float64")
+    navs = panel.ffill().to_numpy(dtype="float64")
+    n_dates, n_schemes = navs.shape
+    cols = np.arange(n_schemes)
+
+    valid = ~np.isnan(raw)
+    has_data = valid.any(axis=0)
+    first_idx = np.where(has_data, valid.argmax(axis=0), 0)
+    last_idx = np.where(has_data, n_dates - 1 - valid[::-1].argmax(axis=0), 0)
+    first_nav = navs[first_idx, cols]
+    last_nav = navs[last_idx, cols]
+    last_date = dates[last_idx]
+
+    out = {}
+    for label, days in HORIZONS.items():
+        target = np.searchsorted(dates, last_date - np.timedelta64(days, "D"), side="right") - 1
+        ok = has_data & (target >= first_idx)
+        base = navs[np.clip(target, 0, None), cols]
+        out[f"{label}_Return_%"] = np.where(ok, (last_nav / base - 1) * 100, np.nan)
+
+    years = (last_date - dates[first_idx]).astype("int64") / 365.25
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+
+        out["CAGR_%"] = np.where(has_data & (years > 0), ((last_nav / first_nav) ** (1 / years) - 1) * 100, np.nan)
+
+        log_returns = np.diff(np.log(navs), axis=0)
+        # Only count days a scheme actually published a NAV
+        log_returns[~valid[1:]] = np.nan
+        window = log_returns[-VOL_WINDOW:]
+        vol = np.nanstd(window, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+        out["Volatility_%"] = np.where(np.sum(~np.isnan(window), axis=0) > 1, vol, np.nan)
+
+        peaks = np.fmax.accumulate(navs, axis=0)
+        out["Max_Drawdown_%"] = np.nanmin(navs / peaks - 1, axis=0) * 100
+
+    return pd.DataFrame(out, index=pd.Index(panel.columns, name="Scheme Code")).round(2)
@@ -0,0 +1,110 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytz
+
+TZ = pytz.timezone("Asia/Kolkata")
+
+CUBE_DIR = "OHLCV_Cube"
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+CHUNK_ROWS = 500_000
+
+class OHLCVCube:
+    """Memory-mapped float64 array shaped [symbol, day, field].
+
+    The cube lives in CUBE_DIR as three files: cube.npy (the data, NaN for
+    days a symbol did not trade), calendar.npy (datetime64[D] trading days)
+    and symbols.json (row order). Every accessor returns a NumPy view into the
+    mapping, so nothing is copied or parsed until the caller touches it.
+    Volumes are stored as float64 too; they are exact up to 2**53.
+    """
+
+    def __init__(self, path=CUBE_DIR, mode="r"):
+        self.path = path
+        self.data = np.load(os.path.join(path, "cube.npy"), mmap_mode=mode)
+        self.calendar = np.load(os.path.join(path, "calendar.npy"))
+        with open(os.path.join(path, "symbols.json")) as f:
+            self.symbols = json.load(f)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.field_index = {field: i for i, field in enumerate(FIELDS)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def _day_slice(self, start=None, end=None):
+        """Calendar slice covering [start, end] (inclusive dates)."""
+        lo = 0 if start is None else np.searchsorted(self.calendar, np.datetime64(pd.Timestamp(start).date(), "D"), "left")
+        hi = len(self.calendar) if end is None else np.searchsorted(self.calendar, np.datetime64(pd.Timestamp(end).date(), "D"), "right")
+        return slice(lo, hi)
+
+    def dates(self, start=None, end=None):
+        return self.calendar[self._day_slice(start, end)]
+
+    def ticker(self, symbol, start=None, end=None):
+        """[day, field] view for one symbol over a date range."""
+        return self.data[self.symbol_index[symbol], self._day_slice(start, end)]
+
+    def day(self, date):
+        """[symbol, field] view of every symbol on one trading day."""
+        i = np.searchsorted(self.calendar, np.datetime64(pd.Timestamp(date).date(), "D"))
+        if i == len(self.calendar) or self.calendar[i] != np.datetime64(pd.Timestamp(date).date(), "D"):
+            raise KeyError(f"{date} is not a trading day in the cube")
+        return self.data[:, i]
+
+    def field(self, name, start=None, end=None):
+        """[symbol, day] view of one field (strided, still zero-copy)."""
+        return self.data[:, self._day_slice(start, end), self.field_index[name]]
+
+    def frame(self, symbol, start=None, end=None):
+        """Convenience copy of ticker() as a DataFrame for plotting/printing."""
+        return pd.DataFrame(self.ticker(symbol, start, end), columns=list(FIELDS),
+                            index=pd.DatetimeIndex(self.dates(start, end), name="Date"))
+
+def _read_chunks(csv_path, chunk_rows):
+    for chunk in pd.read_csv(csv_path, usecols=["Date", "Ticker", *FIELDS], chunksize=chunk_rows):
+        # Bars are stamped at IST midnight; the IST calendar date is the trading day
+        days = pd.to_datetime(chunk["Date"], utc=True).dt.tz_convert(TZ).dt.tz_localize(None)
+        yield chunk, days.to_numpy().astype("datetime64[D]")
+
+def csv_to_cube(csv_path="Full_NSE_Database.csv", path=CUBE_DIR, chunk_rows=CHUNK_ROWS):
+    """Converts the long-format CSV (Date, OHLCV..., Ticker, ...) into a cube.
+
+    Two chunked passes: the first collects the symbol and day universes, the
+    second scatters rows straight into the memory-mapped output, so the full
+    CSV is never held in memory.
+    """
+    symbols = {}
+    days = set()
+    for chunk, chunk_days in _read_chunks(csv_path, chunk_rows):
+        for symbol in chunk["Ticker"].unique():
+            symbols.setdefault(symbol, len(symbols))
+        days.update(np.unique(chunk_days).tolist())
+
+    calendar = np.array(sorted(days), dtype="datetime64[D]")
+    os.makedirs(path, exist_ok=True)
+    cube = np.lib.format.open_memmap(os.path.join(path, "cube.npy"), mode="w+", dtype="float64",
+                                     shape=(len(symbols), len(calendar), len(FIELDS)))
+    cube[:] = np.nan
+
+    for chunk, chunk_days in _read_chunks(csv_path, chunk_rows):
+        rows = chunk["Ticker"].map(symbols).to_numpy()
+        cols = np.searchsorted(calendar, chunk_days)
+        cube[rows, cols] = chunk[list(FIELDS)].to_numpy(dtype="float64")
+
+    cube.flush()
+    del cube
+    np.save(os.path.join(path, "calendar.npy"), calendar)
+    with open(os.path.join(path, "symbols.json"), "w") as f:
+        json.dump(list(symbols), f)
+
+    print(f"Saved {path}: {len(symbols)} symbols x {len(calendar)} days x {len(FIELDS)} fields")
+    return OHLCVCube(path)
+
+if __name__ == "__main__":
+    csv_to_cube()
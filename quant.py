@@ -1,13 +1,16 @@
 import yfinance as yf
 import asyncio
+import contextlib
 import json
 import time
 from datetime import datetime
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from latency import PROMETHEUS_CONTENT_TYPE, REGISTRY, observe, timed
+from market_calendar import default_calendar
 
-app = FastAPI()
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+TICK_SECONDS = 2
+CLIENT_QUEUE_SIZE = 8  # packets a client may fall behind before it is dropped
 
 class QuantumEngine:
     def __init__(self):
@@ -18,18 +21,28 @@ class QuantumEngine:
         ]
         self.pnl = 0.0
 
+    @staticmethod
+    def fetch_price(ticker):
+        # Real Data Fetch (using tail(1) for latest minute)
+        data = yf.Ticker(ticker).history(period="1d", interval="1m").tail(1)
+        return data['Close'].iloc[0] if not data.empty else 0
+
     async def get_data_packet(self):
         # Rotate through tickers every 2 seconds
         ticker = self.tickers[int(time.time() / 2) % len(self.tickers)]
         
-        # Real Data Fetch (using tail(1) for latest minute)
-        data = yf.Ticker(ticker).history(period="1d", interval="1m").tail(1)
-        current_price = data['Close'].iloc[0] if not data.empty else 0
+        # The yfinance call blocks, so it runs on the default thread pool
+        start = time.perf_counter()
+        current_price = await asyncio.get_running_loop().run_in_executor(None, self.fetch_price, ticker)
+        fetched = time.perf_counter()
+        observe("fetch", fetched - start)
         
-        start = time.perf_counter_ns()
         # Simulated Quantum Logic
         signal = "BUY" if (time.time() % 2 > 1) else "SELL"
-        latency = (time.perf_counter_ns() - start) / 1000 
+        decided = time.perf_counter()
+        observe("decision", decided - fetched)
+        # End to end from the start of the fetch, not just the signal expression
+        latency = (decided - start) * 1e6
         
         self.pnl += round((time.time() % 0.1) - 0.045, 3)
 
@@ -42,19 +55,102 @@ class QuantumEngine:
             "pnl": f"{round(self.pnl, 2)}%"
         }
 
+class Broadcaster:
+    """Pub/sub hub: one producer, a bounded queue per connected client.
+
+    publish() never waits on a client. A client whose queue is full is
+    dropped (its queue gets a None sentinel) instead of slowing everyone else.
+    """
+
+    def __init__(self, queue_size=CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.clients = set()
+        self.latest = None
+        self.dropped = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(self.queue_size)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    def _drop(self, queue):
+        self.clients.discard(queue)
+        self.dropped += 1
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def publish(self, message):
+        self.latest = message
+        for queue in list(self.clients):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
 engine = QuantumEngine()
+hub = Broadcaster()
+calendar = default_calendar()
+
+async def producer():
+    """The only caller of get_data_packet: one fetch and one pnl update per tick.
+
+    Outside market hours nothing is fetched; new clients still get the last
+    packet from hub.latest, and the producer sleeps until the next session.
+    """
+    while True:
+        start = time.monotonic()
+        if hub.latest is not None and not calendar.is_active():
+            print(f"Producer idle: {calendar.describe()}")
+            await asyncio.sleep(calendar.poll_interval(TICK_SECONDS))
+            continue
+        try:
+            packet = await engine.get_data_packet()
+            # Serialized once, sent as-is to every client
+            with timed("serialize"):
+                message = json.dumps(packet)
+            with timed("emit"):
+                hub.publish(message)
+        except Exception as e:
+            print(f"Producer tick failed: {e}")
+        await asyncio.sleep(max(0, calendar.poll_interval(TICK_SECONDS) - (time.monotonic() - start)))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(producer())
+    yield
+    task.cancel()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.websocket("/ws/quantum")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    queue = hub.subscribe()
     try:
         while True:
-            packet = await engine.get_data_packet()
-            await websocket.send_json(packet)
-            await asyncio.sleep(2) 
+            message = await queue.get()
+            if message is None:
+                # Fell too far behind; the client can reconnect and resume
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(message)
     except Exception:
         pass
-    
+    finally:
+        hub.unsubscribe(queue)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
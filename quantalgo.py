@@ -1,8 +1,12 @@
-import yfinance as yf
 import numpy as np
+import os
+import pandas as pd
+import sys
 import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from multiprocessing import shared_memory
 
 # 1. Silence Scipy's "SparseEfficiencyWarning" and others
 from scipy.sparse import SparseEfficiencyWarning
@@ -14,29 +18,113 @@ from qiskit_algorithms.optimizers import COBYLA
 from qiskit.primitives import StatevectorSampler as Sampler
 from qiskit_finance.applications.optimization import PortfolioOptimization
 from qiskit_optimization.algorithms import MinimumEigenOptimizer
+from math import comb
+from cluster_optimizer import ticker_clusters, solve_clustered
+from exact_solver import DEFAULT_SOLVER, EXACT_GAP_LIMIT, SOLVERS, optimality_gap, solve_exact
+from history_store import HistoryStore
+from rolling_moments import RollingMoments
+from solve_cache import SolveResult, default_solve_cache
+
+# Frontier sweep grid (budgets default to 1..n-1)
+FRONTIER_RISK_FACTORS = (0.1, 0.25, 0.5, 1.0, 2.0)
+FRONTIER_FILE = "Quantum_Frontier.csv"
+
+# --- Frontier workers ---
+# mu and sigma travel once through a shared memory block laid out as an
+# (n + 1, n) float64 array: row 0 is mu, rows 1..n are sigma. Each worker
+# attaches to it in the pool initializer and keeps its own sampler, so a
+# task only ships (risk_factor, budget) and gets back a small dict.
+_worker = {}
+
+def _init_worker(shm_name, n):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((n + 1, n), dtype=np.float64, buffer=shm.buf)
+    _worker.update(shm=shm, mu=block[0], sigma=block[1:], sampler=Sampler())
+
+def _solve_point(risk_factor, budget, solver, maxiter, clusters=None):
+    mu, sigma = _worker["mu"], _worker["sigma"]
+    start = time.perf_counter()
+    if solver == "exact":
+        result = solve_exact(mu, sigma, risk_factor, budget)
+        evals = result.evaluated
+    elif solver == "clustered":
+        # Already inside a pool worker, so the clusters are solved in-process
+        result = solve_clustered(mu, sigma, risk_factor, budget, clusters=clusters, max_workers=1)
+        evals = len(result.clusters)
+    else:
+        qp = PortfolioOptimization(
+            expected_returns=mu, covariances=sigma, risk_factor=risk_factor, budget=budget
+        ).to_quadratic_program()
+        qaoa = QAOA(sampler=_worker["sampler"], optimizer=COBYLA(maxiter=maxiter), reps=1)
+        result = MinimumEigenOptimizer(qaoa).solve(qp)
+        evals = result.min_eigen_solver_result.cost_function_evals
+    return {
+        "x": np.asarray(result.x).tolist(),
+        "fval": float(result.fval),
+        "evals": int(evals),
+        "solve_ms": (time.perf_counter() - start) * 1000,
+    }
 
 class QuantumPortfolioEngine:
-    def __init__(self):
+    def __init__(self, solver=DEFAULT_SOLVER, use_cache=True, tickers=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
         # Full 10 Nifty 50 Tickers
-        self.tickers = [
+        self.tickers = list(dict.fromkeys(tickers or [
             'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS'
-        ]
+        ]))
+        self.store = HistoryStore()
+        # Returns moments, updated only with the bars that are new since the last call
+        self.moments = RollingMoments(self.tickers, window=63)
+        self.solver = solver
+        self.maxiter = 150
+        # use_cache=False always runs the solver (benchmarking)
+        self.cache = default_solve_cache()
+        self.use_cache = use_cache
+        # risk_factor: balance (0.5), budget: selection size (3)
+        self.risk_factor = 0.5
+        self.budget = 3
 
     def fetch_market_data(self):
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Fetching data for {len(self.tickers)} assets...")
-        data = yf.download(self.tickers, period="3mo", interval="1d", progress=False)['Close']
-        returns = data.pct_change().dropna()
-        return returns.mean().values, returns.cov().values
+        data = self.store.close_panel(self.tickers, period="3mo", interval="1d")
+        return self.moments.extend(data).moments()
 
     def solve_quantum_allocation(self, avg_returns, cov_matrix):
+        """Solver result for (mu, sigma), memoized on the quantized inputs and solver settings."""
+        key = self.cache.key(avg_returns, cov_matrix, self.risk_factor, self.budget,
+                             solver=self.solver, reps=1, maxiter=self.maxiter)
+        start_time = time.perf_counter()
+        cached = self.cache.get(key) if self.use_cache else None
+        if cached is not None:
+            print(f"Solve cache hit ({self.cache.stats()['hit_rate']:.0%} hit rate)")
+            return SolveResult(np.array(cached["x"]), cached["fval"]), (time.perf_counter() - start_time) * 1000
+
+        result, latency = self.run_solver(avg_returns, cov_matrix)
+        if self.use_cache:
+            self.cache.put(key, {"x": np.asarray(result.x).tolist(), "fval": float(result.fval)})
+        return result, latency
+
+    def run_solver(self, avg_returns, cov_matrix):
+        if self.solver == "clustered":
+            clusters = ticker_clusters(self.tickers, cov_matrix)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Solving {len(clusters)} clusters "
+                  f"(largest {max(map(len, clusters))} assets) in parallel...")
+            result = solve_clustered(avg_returns, cov_matrix, self.risk_factor, self.budget, clusters=clusters)
+            return result, result.elapsed_ms
+
+        if self.solver == "exact":
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Enumerating every {self.budget}-asset selection...")
+            result = solve_exact(avg_returns, cov_matrix, self.risk_factor, self.budget)
+            return result, result.elapsed_ms
+
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Mapping problem to 10 qubits...")
         
-        # risk_factor: balance (0.5), budget: selection size (3)
         portfolio = PortfolioOptimization(
             expected_returns=avg_returns, 
             covariances=cov_matrix, 
-            risk_factor=0.5, 
-            budget=3 
+            risk_factor=self.risk_factor, 
+            budget=self.budget 
         )
         qp = portfolio.to_quadratic_program()
         
@@ -47,7 +135,7 @@ class QuantumPortfolioEngine:
 
         sampler = Sampler()
         # COBYLA is the classical optimizer tuning the quantum angles
-        optimizer = COBYLA(maxiter=150) 
+        optimizer = COBYLA(maxiter=self.maxiter) 
         qaoa = QAOA(sampler=sampler, optimizer=optimizer, reps=1, callback=callback)
         
         quantum_solver = MinimumEigenOptimizer(qaoa)
@@ -59,6 +147,81 @@ class QuantumPortfolioEngine:
         
         return result, (end_time - start_time) * 1000
 
+    def frontier(self, mu, sigma, risk_factors=FRONTIER_RISK_FACTORS, budgets=None, max_workers=None):
+        """Solves every risk_factor x budget point on a process pool (one worker per core).
+
+        Points already in the solve cache are not re-solved. Returns the
+        frontier table, one row per point, sorted by budget then risk_factor.
+        """
+        mu = np.asarray(mu, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+        n = len(mu)
+        budgets = range(1, n) if budgets is None else budgets
+        grid = [(risk_factor, budget) for budget in budgets for risk_factor in risk_factors]
+        keys = {point: self.cache.key(mu, sigma, point[0], point[1],
+                                      solver=self.solver, reps=1, maxiter=self.maxiter)
+                for point in grid}
+
+        points = {}
+        for point in grid:
+            cached = self.cache.get(keys[point]) if self.use_cache else None
+            if cached is not None:
+                points[point] = dict(cached, evals=0, solve_ms=0.0, cached=True)
+        todo = [point for point in grid if point not in points]
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Frontier: {len(grid)} points, "
+              f"{len(grid) - len(todo)} cached, {len(todo)} to solve")
+
+        if todo:
+            shm = shared_memory.SharedMemory(create=True, size=(n + 1) * n * 8)
+            try:
+                block = np.ndarray((n + 1, n), dtype=np.float64, buffer=shm.buf)
+                block[0], block[1:] = mu, sigma
+                start = time.perf_counter()
+                with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                         initializer=_init_worker, initargs=(shm.name, n)) as pool:
+                    clusters = ticker_clusters(self.tickers, sigma) if self.solver == "clustered" else None
+                    futures = {pool.submit(_solve_point, rf, b, self.solver, self.maxiter, clusters): (rf, b)
+                               for rf, b in todo}
+                    for done, future in enumerate(as_completed(futures), 1):
+                        point = futures[future]
+                        result = future.result()
+                        points[point] = dict(result, cached=False)
+                        if self.use_cache:
+                            self.cache.put(keys[point], {"x": result["x"], "fval": result["fval"]})
+                        print(f"  [{done}/{len(todo)}] risk_factor={point[0]} budget={point[1]}: "
+                              f"{result['solve_ms']:.0f} ms, {result['evals']} evals "
+                              f"({time.perf_counter() - start:.1f}s elapsed)")
+                del block
+            finally:
+                shm.close()
+                shm.unlink()
+
+        rows = []
+        for risk_factor, budget in grid:
+            point = points[(risk_factor, budget)]
+            x = np.asarray(point["x"])
+            rows.append({
+                "Risk Factor": risk_factor,
+                "Budget": budget,
+                "Selected": ", ".join(t for t, v in zip(self.tickers, x) if v > 0.5),
+                "Objective": point["fval"],
+                "Expected Return": float(x @ mu),
+                "Variance": float(x @ sigma @ x),
+                "Solve ms": round(point["solve_ms"], 1),
+                "Cached": point["cached"],
+            })
+        return pd.DataFrame(rows)
+
+    def run_frontier(self):
+        try:
+            mu, sigma = self.fetch_market_data()
+            table = self.frontier(mu, sigma)
+            print("\n" + table.to_string(index=False))
+            table.to_csv(FRONTIER_FILE, index=False)
+            print(f"Saved {FRONTIER_FILE}")
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+
     def run(self):
         try:
             mu, sigma = self.fetch_market_data()
@@ -73,10 +236,24 @@ class QuantumPortfolioEngine:
             print(f"Time Taken:     {latency/1000:.2f} seconds")
             print(f"Optimal Assets: {chosen}")
             print(f"Solution Value: {result.fval:.6f}")
+            if self.solver != "exact" and comb(len(mu), self.budget) <= EXACT_GAP_LIMIT:
+                gap, exact = optimality_gap(result.x, mu, sigma, self.risk_factor, self.budget)
+                print(f"Exact Optimum:  {exact.fval:.6f} ({exact.elapsed_ms:.2f} ms)")
+                print(f"Optimality Gap: {gap:.2%}")
             print("="*50)
             
         except Exception as e:
             print(f"\n❌ Error: {e}")
 
 if __name__ == "__main__":
-    QuantumPortfolioEngine().run()
\ No newline at end of file
+    if sys.argv[1:] == ["frontier"]:
+        QuantumPortfolioEngine().run_frontier()
+    elif sys.argv[1:] == ["clustered"]:
+        # stock1's ~150-symbol NSE universe through the hierarchical solver; the list
+        # repeats a symbol, which would duplicate a row/column of sigma
+        from stock1 import TICKERS
+        engine = QuantumPortfolioEngine(solver="clustered", tickers=list(dict.fromkeys(TICKERS)))
+        engine.budget = 10
+        engine.run()
+    else:
+        QuantumPortfolioEngine().run()
\ No newline at end of file
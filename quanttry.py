@@ -1,4 +1,3 @@
-import yfinance as yf
 import numpy as np
 import time
 import warnings
@@ -13,26 +12,68 @@ from qiskit_algorithms.optimizers import COBYLA
 from qiskit.primitives import StatevectorSampler as Sampler
 from qiskit_finance.applications.optimization import PortfolioOptimization
 from qiskit_optimization.algorithms import MinimumEigenOptimizer
+from cluster_optimizer import ticker_clusters, solve_clustered
+from exact_solver import DEFAULT_SOLVER, SOLVERS, optimality_gap, solve_exact
+from history_store import HistoryStore
+from rolling_moments import RollingMoments
+from solve_cache import SolveResult, default_solve_cache
 
 class QuantumPortfolioEngine:
-    def __init__(self):
+    def __init__(self, solver=DEFAULT_SOLVER, use_cache=True):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
         # Reduced to 4 tickers for a fast first test (Change back to 10 once verified)
         self.tickers = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS']
+        self.store = HistoryStore()
+        # Returns moments, updated only with the bars that are new since the last call
+        self.moments = RollingMoments(self.tickers, window=63)
+        self.solver = solver
+        self.maxiter = 100
+        # use_cache=False always runs the solver (benchmarking)
+        self.cache = default_solve_cache()
+        self.use_cache = use_cache
+        self.risk_factor = 0.5
+        self.budget = 2 # Selecting 2 best out of 4
 
     def fetch_market_data(self):
         print(f"--- Fetching data for {len(self.tickers)} assets ---")
-        data = yf.download(self.tickers, period="3mo", interval="1d", progress=False)['Close']
-        returns = data.pct_change().dropna()
-        return returns.mean().values, returns.cov().values
+        data = self.store.close_panel(self.tickers, period="3mo", interval="1d")
+        return self.moments.extend(data).moments()
 
     def solve_quantum_allocation(self, avg_returns, cov_matrix):
+        """Solver result for (mu, sigma), memoized on the quantized inputs and solver settings."""
+        key = self.cache.key(avg_returns, cov_matrix, self.risk_factor, self.budget,
+                             solver=self.solver, reps=1, maxiter=self.maxiter)
+        start_time = time.perf_counter()
+        cached = self.cache.get(key) if self.use_cache else None
+        if cached is not None:
+            print(f"Solve cache hit ({self.cache.stats()['hit_rate']:.0%} hit rate)")
+            return SolveResult(np.array(cached["x"]), cached["fval"]), (time.perf_counter() - start_time) * 1000
+
+        result, latency = self.run_solver(avg_returns, cov_matrix)
+        if self.use_cache:
+            self.cache.put(key, {"x": np.asarray(result.x).tolist(), "fval": float(result.fval)})
+        return result, latency
+
+    def run_solver(self, avg_returns, cov_matrix):
+        if self.solver == "clustered":
+            print("--- Solving sector/correlation clusters in parallel ---")
+            result = solve_clustered(avg_returns, cov_matrix, self.risk_factor, self.budget,
+                                     clusters=ticker_clusters(self.tickers, cov_matrix))
+            return result, result.elapsed_ms
+
+        if self.solver == "exact":
+            print("--- Solving exactly (every selection enumerated) ---")
+            result = solve_exact(avg_returns, cov_matrix, self.risk_factor, self.budget)
+            return result, result.elapsed_ms
+
         print("--- Starting Quantum Optimization (Check your CPU usage!) ---")
         
         portfolio = PortfolioOptimization(
             expected_returns=avg_returns, 
             covariances=cov_matrix, 
-            risk_factor=0.5, 
-            budget=2 # Selecting 2 best out of 4
+            risk_factor=self.risk_factor, 
+            budget=self.budget
         )
         qp = portfolio.to_quadratic_program()
         
@@ -42,7 +83,7 @@ class QuantumPortfolioEngine:
                 print(f"  Iteration {eval_count}: Energy Mean = {mean:.4f}")
 
         sampler = Sampler()
-        optimizer = COBYLA(maxiter=100) # Limit iterations for speed
+        optimizer = COBYLA(maxiter=self.maxiter) # Limit iterations for speed
         qaoa = QAOA(sampler=sampler, optimizer=optimizer, reps=1, callback=callback)
         
         quantum_solver = MinimumEigenOptimizer(qaoa)
@@ -64,6 +105,9 @@ class QuantumPortfolioEngine:
             print(f"🚀 SUCCESS AT {datetime.now().strftime('%H:%M:%S')}")
             print(f"Selected Assets: {chosen}")
             print(f"Total Time: {latency/1000:.2f} seconds")
+            if self.solver != "exact":
+                gap, exact = optimality_gap(result.x, mu, sigma, self.risk_factor, self.budget)
+                print(f"Optimality Gap: {gap:.2%} (exact {exact.fval:.4f} in {exact.elapsed_ms:.2f} ms)")
             print("="*40)
         except Exception as e:
             print(f"Error: {e}")
@@ -0,0 +1,180 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+WINDOW = 21  # returns (~1 month of daily bars)
+
+class RollingMoments:
+    """Mean vector and covariance matrix of asset returns, updated per bar in O(n^2).
+
+    Prices go in, returns are formed against each asset's last traded price,
+    so a symbol that did not trade on a day simply contributes NaN for that
+    day instead of the whole row being dropped. Moments are pairwise
+    complete: for every pair (i, j) the engine keeps the count, the means of
+    i and j over the rows where both traded, and the co-moment, and updates
+    them Welford-style as a row enters and leaves the window. On fully
+    populated data that is exactly returns.mean() / returns.cov(); with gaps
+    it matches pandas' pairwise cov().
+
+    halflife switches to exponentially weighted moments (RiskMetrics-style
+    recursion, no window eviction from the moments). shrinkage=True applies
+    Ledoit-Wolf shrinkage towards a scaled identity, with the intensity
+    estimated from the last `window` rows of returns.
+    """
+
+    def __init__(self, columns, window=WINDOW, halflife=None, shrinkage=False):
+        self.columns = list(columns)
+        n = len(self.columns)
+        self.window = window
+        self.alpha = None if halflife is None else 1 - 0.5 ** (1 / halflife)
+        self.shrinkage = shrinkage
+
+        self.count = np.zeros((n, n))
+        self.means = np.zeros((n, n))  # means[i, j]: mean of asset i over rows where i and j traded
+        self.comoment = np.zeros((n, n))
+        self.rows = deque()            # (timestamp, returns) in the window
+        self.last_prices = np.full(n, np.nan)
+        self.last_timestamp = None
+        self.last_close = None         # prices of the newest bar, to spot revisions
+        self._undo = None
+
+    # --- Welford updates ---
+
+    def _add(self, x):
+        valid = ~np.isnan(x)
+        pair = np.outer(valid, valid)
+        if not pair.any():
+            return
+        xi = np.where(valid, x, 0.0)[:, None]
+        xj = np.where(valid, x, 0.0)[None, :]
+        if self.alpha is None:
+            self.count += pair
+            dx = np.where(pair, xi - self.means, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.means += np.where(pair, dx / self.count, 0.0)
+            self.comoment += np.where(pair, dx * (xj - self.means.T), 0.0)
+        else:
+            first = pair & (self.count == 0)
+            self.count += pair
+            dx = np.where(pair, xi - self.means, 0.0)
+            dy = np.where(pair, xj - self.means.T, 0.0)
+            self.means = np.where(first, xi, self.means + self.alpha * dx)
+            update = (1 - self.alpha) * (self.comoment + self.alpha * dx * dy)
+            self.comoment = np.where(pair & ~first, update, np.where(first, 0.0, self.comoment))
+
+    def _remove(self, x):
+        valid = ~np.isnan(x)
+        pair = np.outer(valid, valid)
+        if not pair.any():
+            return
+        xi = np.where(valid, x, 0.0)[:, None]
+        xj = np.where(valid, x, 0.0)[None, :]
+        old_means_t = self.means.T.copy()
+        self.count -= pair
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_means = np.where(pair, self.means - (xi - self.means) / self.count, self.means)
+        self.comoment -= np.where(pair, (xi - new_means) * (xj - old_means_t), 0.0)
+        empty = pair & (self.count == 0)
+        self.means = np.where(empty, 0.0, new_means)
+        self.comoment[empty] = 0.0
+
+    # --- Feeding bars ---
+
+    def push(self, timestamp, returns):
+        """Adds one row of returns (NaN = no trade) and evicts the oldest beyond the window."""
+        x = np.asarray(returns, dtype=float)
+        evicted = None
+        self._add(x)
+        self.rows.append((timestamp, x))
+        if len(self.rows) > self.window:
+            evicted = self.rows.popleft()
+            # EWMA moments never forget a row; there the window only bounds the shrinkage sample
+            if self.alpha is None:
+                self._remove(evicted[1])
+        return evicted
+
+    def update(self, timestamp, prices):
+        """Feeds one bar of prices aligned to columns; a repeat of the newest timestamp is a revision."""
+        prices = np.asarray(prices, dtype=float)
+        if self.last_timestamp is not None and timestamp == self.last_timestamp:
+            if np.array_equal(prices, self.last_close, equal_nan=True):
+                return
+            self._revert()
+        elif self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return
+
+        state = (self.count.copy(), self.means.copy(), self.comoment.copy(), self.last_prices.copy(),
+                 self.last_timestamp, self.last_close)
+        evicted = None
+        if not np.all(np.isnan(self.last_prices)):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                evicted = self.push(timestamp, prices / self.last_prices - 1)
+        self._undo = state + (evicted, len(self.rows))
+
+        traded = ~np.isnan(prices)
+        self.last_prices[traded] = prices[traded]
+        self.last_timestamp, self.last_close = timestamp, prices
+
+    def _revert(self):
+        """Undoes the newest update() so a revised bar can replace it."""
+        count, means, comoment, last_prices, last_timestamp, last_close, evicted, n_rows = self._undo
+        if len(self.rows) == n_rows and n_rows and self.rows[-1][0] == self.last_timestamp:
+            self.rows.pop()
+        if evicted is not None:
+            self.rows.appendleft(evicted)
+        self.count, self.means, self.comoment = count, means, comoment
+        self.last_prices, self.last_timestamp, self.last_close = last_prices, last_timestamp, last_close
+        self._undo = None
+
+    def extend(self, frame):
+        """Feeds the rows of a Date x ticker close frame that are new (or revise the newest bar).
+
+        Safe to call with an overlapping frame every cycle; only the delta is applied.
+        """
+        frame = frame.reindex(columns=self.columns)
+        if self.last_timestamp is not None:
+            frame = frame[frame.index >= self.last_timestamp]
+        for timestamp, prices in zip(frame.index, frame.to_numpy(dtype=float)):
+            self.update(timestamp, prices)
+        return self
+
+    # --- Reading ---
+
+    def mean(self):
+        return np.diag(self.means).copy()
+
+    def _shrinkage_intensity(self, cov):
+        """Ledoit-Wolf (2004) intensity towards mean-variance * I from the window's returns."""
+        if not self.rows:
+            return 0.0
+        X = np.array([x for _, x in self.rows])
+        X = np.where(np.isnan(X), 0.0, X - np.nanmean(X, axis=0))
+        T, n = X.shape
+        sample = X.T @ X / T
+        target = np.trace(sample) / n
+        d2 = np.sum((sample - target * np.eye(n)) ** 2)
+        if d2 == 0:
+            return 0.0
+        b2 = sum(np.sum((np.outer(x, x) - sample) ** 2) for x in X) / T ** 2
+        return float(min(b2, d2) / d2)
+
+    def cov(self):
+        if self.alpha is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cov = np.where(self.count > 1, self.comoment / (self.count - 1), np.nan)
+        else:
+            cov = np.where(self.count > 1, self.comoment, np.nan)
+        if self.shrinkage:
+            delta = self._shrinkage_intensity(cov)
+            target = np.nanmean(np.diag(cov))
+            cov = delta * target * np.eye(len(cov)) + (1 - delta) * cov
+        return cov
+
+    def moments(self):
+        """(mu, sigma) as NumPy arrays in column order, like returns.mean().values / .cov().values."""
+        return self.mean(), self.cov()
+
+    def frame(self):
+        return pd.Series(self.mean(), index=self.columns), pd.DataFrame(self.cov(), index=self.columns,
+                                                                         columns=self.columns)
@@ -0,0 +1,118 @@
+import json
+import os
+from collections import deque
+
+WEEK_52 = 364  # days
+
+class RollingExtremes:
+    """Rolling max of highs / min of lows over the last `window` calendar days.
+
+    Two monotonic deques of (day, value) give O(1) amortized updates: a new
+    bar evicts every older value it dominates, and values older than the
+    window fall off the front. The most recent bar is held separately as
+    `pending` until a later day arrives, so a revised intraday bar for the
+    same day simply replaces it instead of corrupting the deques.
+
+    Days are integer ordinals (date.toordinal()), so the same engine works for
+    commodities, equities or any other daily series.
+    """
+
+    def __init__(self, window=WEEK_52):
+        self.window = window
+        self.maxq = deque()
+        self.minq = deque()
+        self.pending = None  # [day, high, low]
+
+    def _push(self, day, high, low):
+        while self.maxq and self.maxq[-1][1] <= high:
+            self.maxq.pop()
+        self.maxq.append((day, high))
+        while self.minq and self.minq[-1][1] >= low:
+            self.minq.pop()
+        self.minq.append((day, low))
+
+    def _expire(self, today):
+        cutoff = today - self.window
+        while self.maxq and self.maxq[0][0] <= cutoff:
+            self.maxq.popleft()
+        while self.minq and self.minq[0][0] <= cutoff:
+            self.minq.popleft()
+
+    def update(self, day, high, low):
+        """Feeds one bar. Bars older than the pending one are ignored."""
+        if self.pending is not None:
+            if day < self.pending[0]:
+                return
+            if day > self.pending[0]:
+                self._push(*self.pending)
+        self.pending = [day, high, low]
+        self._expire(day)
+
+    @property
+    def last_day(self):
+        return None if self.pending is None else self.pending[0]
+
+    @property
+    def high(self):
+        values = [self.maxq[0][1]] if self.maxq else []
+        if self.pending is not None:
+            values.append(self.pending[1])
+        return max(values) if values else None
+
+    @property
+    def low(self):
+        values = [self.minq[0][1]] if self.minq else []
+        if self.pending is not None:
+            values.append(self.pending[2])
+        return min(values) if values else None
+
+    def to_dict(self):
+        return {
+            "window": self.window,
+            "max": list(self.maxq),
+            "min": list(self.minq),
+            "pending": self.pending,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        ext = cls(state["window"])
+        ext.maxq = deque(tuple(item) for item in state["max"])
+        ext.minq = deque(tuple(item) for item in state["min"])
+        ext.pending = state["pending"]
+        return ext
+
+class RollingExtremesStore:
+    """Per-symbol RollingExtremes persisted between runs in one JSON file."""
+
+    def __init__(self, path, window=WEEK_52):
+        self.path = path
+        self.window = window
+        self.states = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            for symbol, state in stored.items():
+                if state["window"] == window:
+                    self.states[symbol] = RollingExtremes.from_dict(state)
+
+    def __contains__(self, symbol):
+        return symbol in self.states
+
+    def get(self, symbol):
+        if symbol not in self.states:
+            self.states[symbol] = RollingExtremes(self.window)
+        return self.states[symbol]
+
+    def update_from_frame(self, symbol, hist):
+        """Feeds a Date-indexed frame with High/Low columns; returns the extremes."""
+        ext = self.get(symbol)
+        for ts, high, low in zip(hist.index, hist["High"].to_numpy(), hist["Low"].to_numpy()):
+            ext.update(ts.date().toordinal(), float(high), float(low))
+        return ext
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({symbol: ext.to_dict() for symbol, ext in self.states.items()}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from datetime import datetime
+
+# Optional: pip install msgpack (binary frames). Without it frames are JSON.
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+# One frame per QuantFinal cycle instead of one event per selected ticker.
+# Bump SCHEMA_VERSION on any change to the frame layout below.
+SCHEMA_VERSION = 1
+BATCH_EVENT = "quantum_batch"
+LEGACY_EVENT = "quantum_update"
+ENCODINGS = ("json", "msgpack") if HAS_MSGPACK else ("json",)
+
+# PORTFOLIO_LEGACY_EVENTS=0 stops emitting per-ticker quantum_update events
+# to dashboards that have not subscribed to the batch frames.
+LEGACY_EVENTS = os.environ.get("PORTFOLIO_LEGACY_EVENTS", "1") != "0"
+
+SIGNALS = {"BUY": 1, "SELL": -1, "HOLD": 0}
+SIGNAL_NAMES = {code: name for name, code in SIGNALS.items()}
+
+def build_frame(tickers, prices, signals, pnl, latency_us, ts=None):
+    """Columnar, all-numeric frame for one cycle.
+
+    {"v": schema, "ts": epoch ms, "latency_us": float,
+     "tickers": [str], "price": [float], "signal": [1 | 0 | -1], "pnl": [percent]}
+
+    pnl is the running session P&L after each ticker, in percent.
+    """
+    return {
+        "v": SCHEMA_VERSION,
+        "ts": int((time.time() if ts is None else ts) * 1000),
+        "latency_us": round(float(latency_us), 2),
+        "tickers": list(tickers),
+        "price": [round(float(price), 2) for price in prices],
+        "signal": [SIGNALS[signal] if isinstance(signal, str) else int(signal) for signal in signals],
+        "pnl": [round(float(value), 4) for value in pnl],
+    }
+
+def encode_frame(frame, encoding="json"):
+    """The emit payload: the frame dict itself for "json" (Socket.IO serializes it
+    once into the text packet), bytes for "msgpack" (binary attachment)."""
+    if encoding == "json":
+        return frame
+    if encoding == "msgpack":
+        if not HAS_MSGPACK:
+            raise ValueError("msgpack encoding needs `pip install msgpack`")
+        return msgpack.packb(frame, use_bin_type=True)
+    raise ValueError(f"Unknown frame encoding: {encoding}")
+
+def decode_frame(payload):
+    if isinstance(payload, (bytes, bytearray)):
+        frame = msgpack.unpackb(payload, raw=False)
+    else:
+        frame = json.loads(payload) if isinstance(payload, str) else payload
+    if frame.get("v") != SCHEMA_VERSION:
+        raise ValueError(f"Frame schema {frame.get('v')} is not {SCHEMA_VERSION}")
+    return frame
+
+def legacy_packets(frame):
+    """The per-ticker quantum_update packets the existing dashboard expects."""
+    timestamp = datetime.fromtimestamp(frame["ts"] / 1000).strftime("%H:%M:%S")
+    return [
+        {
+            "timestamp": timestamp,
+            "ticker": ticker,
+            "price": price,
+            "signal": SIGNAL_NAMES[signal],
+            "latency_us": frame["latency_us"],
+            "pnl": f"{round(pnl, 2)}%",
+        }
+        for ticker, price, signal, pnl in zip(frame["tickers"], frame["price"], frame["signal"], frame["pnl"])
+    ]
+
+def _wire_size(event, payload):
+    """Approximate bytes of one Socket.IO EVENT packet (text, or header + binary attachment)."""
+    if isinstance(payload, bytes):
+        header = f'451-["{event}",{{"_placeholder":true,"num":0}}]'
+        return len(header) + len(payload)
+    return len(f'42["{event}",'.encode()) + len(json.dumps(payload, separators=(",", ":")).encode()) + 1
+
+def benchmark(sizes=(4, 10, 50), cycles=1000):
+    """Bytes per client per cycle and encode cost: legacy events vs one batch frame."""
+    print(f"{'selected':>9}{'legacy B':>10}{'json B':>8}{'msgpack B':>11}{'legacy us':>11}{'batch us':>10}")
+    for n in sizes:
+        tickers = [f"TICKER{i}" for i in range(n)]
+        frame = build_frame(tickers, [1234.5 + i for i in range(n)], ["BUY"] * n,
+                            [0.01 * i for i in range(n)], 123456.78)
+        legacy = sum(_wire_size(LEGACY_EVENT, packet) for packet in legacy_packets(frame))
+        sizes_by_encoding = {encoding: _wire_size(BATCH_EVENT, encode_frame(frame, encoding))
+                             for encoding in ENCODINGS}
+
+        start = time.perf_counter()
+        for _ in range(cycles):
+            [json.dumps(packet, separators=(",", ":")) for packet in legacy_packets(frame)]
+        legacy_us = (time.perf_counter() - start) / cycles * 1e6
+        start = time.perf_counter()
+        for _ in range(cycles):
+            payload = encode_frame(frame, ENCODINGS[-1])
+            if not isinstance(payload, bytes):
+                json.dumps(payload, separators=(",", ":"))
+        batch_us = (time.perf_counter() - start) / cycles * 1e6
+        print(f"{n:>9}{legacy:>10}{sizes_by_encoding['json']:>8}"
+              f"{sizes_by_encoding.get('msgpack', float('nan')):>11}{legacy_us:>11.1f}{batch_us:>10.1f}")
+
+if __name__ == "__main__":
+    benchmark()
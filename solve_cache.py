@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+# PORTFOLIO_SOLVE_CACHE=0 bypasses the cache entirely (benchmarking).
+# PORTFOLIO_SOLVE_CACHE_DIR sets the disk tier; an empty value disables it.
+ENABLED = os.environ.get("PORTFOLIO_SOLVE_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get("PORTFOLIO_SOLVE_CACHE_DIR", "Solve_Cache")
+MAX_ENTRIES = 256
+SIGNIFICANT_DIGITS = 6  # inputs equal to this many digits share a key
+
+# What the engines read back from a cached solve (same fields as a solver result)
+SolveResult = namedtuple("SolveResult", ["x", "fval"])
+
+def quantize(values, digits=SIGNIFICANT_DIGITS):
+    """Rounds every value to `digits` significant digits (zeros and NaNs kept)."""
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** np.where(np.isfinite(magnitude), digits - 1 - magnitude, 0)
+    # + 0.0 folds -0.0 into 0.0 so both hash the same
+    return np.round(values * scale) / scale + 0.0
+
+class SolveCache:
+    """Memoized portfolio solves: in-memory LRU in front of one JSON file per key.
+
+    Keys hash the quantized mu/sigma, risk_factor, budget and the solver
+    configuration, so repeated runs on the same daily bars (another CLI run,
+    the next QuantFinal cycle) skip the solver. Values must be JSON-friendly.
+    """
+
+    def __init__(self, path=CACHE_DIR, max_entries=MAX_ENTRIES, enabled=ENABLED,
+                 digits=SIGNIFICANT_DIGITS):
+        self.path = path or None
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.digits = digits
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, mu, sigma, risk_factor, budget, **config):
+        digest = hashlib.sha1()
+        for array in (mu, sigma):
+            q = quantize(array, self.digits)
+            digest.update(repr(q.shape).encode())
+            digest.update(q.tobytes())
+        digest.update(json.dumps([quantize(risk_factor, self.digits).item(), int(budget), config],
+                                 sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def _remember(self, key, value):
+        # caller holds the lock
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """Cached value for key, or None (always None while bypassed)."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return self.entries[key]
+        if self.path is not None and os.path.exists(self._file(key)):
+            try:
+                with open(self._file(key)) as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._remember(key, value)
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            tmp = f"{self._file(key)}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp, self._file(key))
+
+    def clear(self):
+        """Drops the memory tier (the disk tier is left alone)."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "enabled": self.enabled,
+            }
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def default_solve_cache():
+    """Process-wide cache shared by the portfolio engines."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SolveCache()
+        return _default_cache
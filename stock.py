@@ -1,8 +1,10 @@
-import yfinance as yf
 import pandas as pd
-import time
 from datetime import datetime, timedelta
 import pytz 
+from fetcher import default_executor
+from fundamentals import default_cache
+from history_store import HistoryStore
+from storage import save_frame
 
 TICKERS = ['ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
     'BAJAJ-AUTO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'BPCL.NS', 'BHARTIARTL.NS',
@@ -45,50 +47,64 @@ def fetch_portfolio_data():
     three_months_ago = today - timedelta(days=90)
     six_months_ago = today - timedelta(days=180)
 
-    for symbol in TICKERS:
-        try:
-            print(f"Syncing: {symbol}...")
-            ticker = yf.Ticker(symbol)
-            full_hist = ticker.history(start=six_months_ago, end=today)
-            
-            if full_hist.empty:
-                print(f"No data for {symbol}")
-                continue
+    cache = default_cache()
+    fundamentals = cache.get_many(TICKERS)
+    executor = default_executor()
+    store = HistoryStore(executor=executor)
 
-            info = ticker.info
-            sector = info.get('sector', 'N/A')
-            market_cap = info.get('marketCap', 0)
-            pe_ratio = info.get('trailingPE', 0)
-            comp_name = info.get('longName', symbol)
-            daily_df = full_hist[full_hist.index >= three_months_ago].copy()
-            if not daily_df.empty:
-                daily_df['Ticker'] = symbol
-                daily_df['Company Name'] = comp_name
-                daily_df['Sector'] = sector
-                daily_df['Market Cap'] = market_cap
-                daily_df['PE Ratio'] = pe_ratio
-                daily_records.append(daily_df)
-            older_df = full_hist[full_hist.index < three_months_ago].copy()
-            if not older_df.empty:
-                monthly_resampled = older_df.resample('ME').mean()
-                monthly_resampled['Ticker'] = symbol
-                monthly_resampled['Company Name'] = comp_name
-                monthly_resampled['Type'] = 'Monthly_Average'
-                monthly_averages.append(monthly_resampled)
+    def sync_symbol(symbol):
+        print(f"Syncing: {symbol}...")
+        # Only the bars after the last stored one go over the network
+        store.sync(symbol, period="6mo")
+        full_hist = store.read(symbol, start=six_months_ago, end=today)
+
+        if full_hist.empty:
+            print(f"No data for {symbol}")
+            return None, None
+
+        info = fundamentals.get(symbol, {})
+        sector = info.get('sector', 'N/A')
+        market_cap = info.get('marketCap', 0)
+        pe_ratio = info.get('trailingPE', 0)
+        comp_name = info.get('longName', symbol)
+        daily_df = full_hist[full_hist.index >= three_months_ago].copy()
+        if not daily_df.empty:
+            daily_df['Ticker'] = symbol
+            daily_df['Company Name'] = comp_name
+            daily_df['Sector'] = sector
+            daily_df['Market Cap'] = market_cap
+            daily_df['PE Ratio'] = pe_ratio
+        older_df = full_hist[full_hist.index < three_months_ago].copy()
+        monthly_resampled = None
+        if not older_df.empty:
+            monthly_resampled = older_df.resample('ME').mean()
+            monthly_resampled['Ticker'] = symbol
+            monthly_resampled['Company Name'] = comp_name
+            monthly_resampled['Type'] = 'Monthly_Average'
+        return daily_df, monthly_resampled
+
+    for symbol, result, error in executor.fetch_all(sync_symbol, TICKERS):
+        if error is not None:
+            print(f"Error {symbol}: {error}")
+            continue
+        daily_df, monthly_resampled = result
+        if daily_df is not None and not daily_df.empty:
+            daily_records.append(daily_df)
+        if monthly_resampled is not None:
+            monthly_averages.append(monthly_resampled)
 
-            time.sleep(0.2) 
-        except Exception as e:
-            print(f"Error {symbol}: {e}")
     if daily_records:
-        pd.concat(daily_records).to_csv("Daily_3Mo_Data.csv")
-        print("Saved Daily_3Mo_Data.csv")
+        path = save_frame(pd.concat(daily_records), "Daily_3Mo_Data", partition_cols=["Ticker"])
+        print(f"Saved {path}")
     
     if monthly_averages:
-        pd.concat(monthly_averages).to_csv("Monthly_Avg_Data.csv")
-        print("Saved Monthly_Avg_Data.csv")
+        path = save_frame(pd.concat(monthly_averages), "Monthly_Avg_Data", partition_cols=["Ticker"])
+        print(f"Saved {path}")
 
     if not daily_records and not monthly_averages:
         print("Critical Error: No data was collected for any ticker.")
 
+    print(f"Fundamentals cache: {cache.stats()}")
+
 if __name__ == "__main__":
     fetch_portfolio_data()
\ No newline at end of file
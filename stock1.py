@@ -1,8 +1,11 @@
 import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import pytz
-import time
+from fetcher import default_executor
+from fundamentals import default_cache
+from history_store import HistoryStore
 
 TICKERS = ['ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
     'BAJAJ-AUTO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'BPCL.NS', 'BHARTIARTL.NS',
@@ -61,46 +64,53 @@ def fetch_portfolio_data():
     now = datetime.now(TZ)
     records = []
 
-    for symbol in TICKERS:
-        try:
-            print(f"Fetching {symbol}")
-            ticker = yf.Ticker(symbol)
+    cache = default_cache()
+    fundamentals = cache.get_many(TICKERS)
+    executor = default_executor()
+    store = HistoryStore(executor=executor)
+
+    def fetch_symbol(symbol):
+        print(f"Fetching {symbol}")
+
+        hist = store.history(symbol, period="6mo")
+        if hist.empty:
+            return []
+        hist = hist[["Open", "High", "Low", "Close", "Volume"]]
+
+        info = fundamentals.get(symbol, {})
+        meta = {
+            "Ticker": symbol,
+            "Company": info.get("longName", symbol),
+            "Sector": info.get("sector", "N/A"),
+            "MarketCap": info.get("marketCap", 0),
+            "PE": info.get("trailingPE", 0),
+            "LastUpdated": now.isoformat()
+        }
+
+        rows = []
+        for label, days in PERIODS.items():
+            if days == 0:  # today
+                df = hist.tail(1)
+            else:
+                start = now - timedelta(days=days)
+                df = hist[hist.index >= start]
 
-            hist = ticker.history(period="6mo", actions=False)
-            if hist.empty:
+            if df.empty:
                 continue
 
-            info = ticker.info
-            meta = {
-                "Ticker": symbol,
-                "Company": info.get("longName", symbol),
-                "Sector": info.get("sector", "N/A"),
-                "MarketCap": info.get("marketCap", 0),
-                "PE": info.get("trailingPE", 0),
-                "LastUpdated": now.isoformat()
-            }
-
-            for label, days in PERIODS.items():
-                if days == 0:  # today
-                    df = hist.tail(1)
-                else:
-                    start = now - timedelta(days=days)
-                    df = hist[hist.index >= start]
-
-                if df.empty:
-                    continue
-
-                metrics = cumulative_metrics(df)
-                records.append({
-                    **meta,
-                    "Period": label,
-                    **metrics
-                })
-
-            time.sleep(0.2)
-
-        except Exception as e:
-            print(f"{symbol} failed: {e}")
+            metrics = cumulative_metrics(df)
+            rows.append({
+                **meta,
+                "Period": label,
+                **metrics
+            })
+        return rows
+
+    for symbol, rows, error in executor.fetch_all(fetch_symbol, TICKERS):
+        if error is not None:
+            print(f"{symbol} failed: {error}")
+            continue
+        records.extend(rows)
 
     if records:
         pd.DataFrame(records).to_csv("Structured_Portfolio_Data.csv", index=False)
@@ -108,5 +118,139 @@ def fetch_portfolio_data():
     else:
         print("No data collected")
 
+    print(f"Fundamentals cache: {cache.stats()}")
+
+def download_history_panel(symbols, period="6mo", chunk_size=50):
+    """Downloads daily bars for many symbols in chunked multi-ticker requests.
+
+    Returns one long frame indexed by Date with a Ticker column, grouped by
+    ticker in the order the symbols were given.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    frames = []
+
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        print(f"Downloading {len(chunk)} tickers ({i + 1}-{i + len(chunk)} of {len(symbols)})")
+        # ignore_tz=False keeps the Asia/Kolkata index that Ticker.history returns
+        data = yf.download(chunk, period=period, group_by="ticker", auto_adjust=True,
+                           actions=False, ignore_tz=False, threads=True, progress=False)
+        if data.empty:
+            continue
+
+        available = set(data.columns.get_level_values(0))
+        for symbol in chunk:
+            if symbol not in available:
+                continue
+            # The panel is aligned on the union of dates, drop the padding rows
+            df = data[symbol].dropna(how="all", subset=["Open", "High", "Low", "Close"])
+            if df.empty:
+                continue
+            df = df[["Open", "High", "Low", "Close", "Volume"]].copy()
+            df["Volume"] = df["Volume"].fillna(0).astype("int64")
+            df["Ticker"] = symbol
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume", "Ticker"])
+    return pd.concat(frames)
+
+def aggregate_periods(panel, now):
+    """Computes cumulative_metrics for every (ticker, period) pair in one pass.
+
+    Rows are sorted by (ticker, date) so each ticker is a contiguous block.
+    Window starts come from a searchsorted over a composite (ticker, seconds)
+    key, and the reductions run over all windows at once.
+    """
+    codes, symbols = pd.factorize(panel["Ticker"])
+    ts = panel.index.as_unit("ns").asi8 // 10**9
+    order = np.lexsort((ts, codes))
+    codes, ts = codes[order], ts[order]
+
+    opens = panel["Open"].to_numpy(dtype="float64")[order]
+    highs = panel["High"].to_numpy(dtype="float64")[order]
+    lows = panel["Low"].to_numpy(dtype="float64")[order]
+    closes = panel["Close"].to_numpy(dtype="float64")[order]
+    volumes = panel["Volume"].to_numpy(dtype="int64")[order]
+
+    # Seconds since the first bar always fit in the low 32 bits of the key
+    base = ts.min()
+    sym_ids = np.arange(len(symbols), dtype="int64")
+    keys = codes.astype("int64") * 2**32 + (ts - base)
+    ends = np.searchsorted(codes, sym_ids, side="right")
+
+    starts = []
+    for days in PERIODS.values():
+        if days == 0:  # today
+            starts.append(ends - 1)
+            continue
+        # hist.index >= start, with start rounded up to the bar resolution
+        cutoff = -(-pd.Timestamp(now - timedelta(days=days)).as_unit("ns").value // 10**9)
+        rel = np.clip(cutoff - base, 0, 2**32 - 1)
+        starts.append(np.searchsorted(keys, sym_ids * 2**32 + rel, side="left"))
+
+    starts = np.column_stack(starts).ravel()
+    stops = np.repeat(ends, len(PERIODS))
+    sym_idx = np.repeat(sym_ids, len(PERIODS))
+    period_idx = np.tile(np.arange(len(PERIODS)), len(symbols))
+
+    valid = starts < stops
+    starts, stops = starts[valid], stops[valid]
+
+    # reduceat over interleaved (start, stop) bounds; the NaN pad makes
+    # stop == len(rows) a legal index and fmax/fmin skip it like pandas does
+    bounds = np.column_stack([starts, stops]).ravel()
+    high = np.fmax.reduceat(np.append(highs, np.nan), bounds)[::2]
+    low = np.fmin.reduceat(np.append(lows, np.nan), bounds)[::2]
+    cum_volume = np.concatenate([[0], np.cumsum(volumes)])
+
+    return pd.DataFrame({
+        "Ticker": np.asarray(symbols)[sym_idx[valid]],
+        "Period": np.asarray(list(PERIODS))[period_idx[valid]],
+        "Open": opens[starts],
+        "High": high,
+        "Low": low,
+        "Close": closes[stops - 1],
+        "Volume": cum_volume[stops] - cum_volume[starts]
+    })
+
+def fetch_portfolio_data_batched(chunk_size=50):
+    """Same output as fetch_portfolio_data, from a handful of bulk downloads."""
+    now = datetime.now(TZ)
+
+    panel = download_history_panel(TICKERS, period="6mo", chunk_size=chunk_size)
+    if panel.empty:
+        print("No data collected")
+        return
+
+    metrics = aggregate_periods(panel, now)
+
+    fetched = set(panel["Ticker"])
+    cache = default_cache()
+    fundamentals = cache.get_many([s for s in TICKERS if s in fetched])
+    meta = []
+    for symbol in TICKERS:
+        if symbol not in fetched:
+            continue
+        info = fundamentals[symbol]
+        meta.append({
+            "Ticker": symbol,
+            "Company": info.get("longName", symbol),
+            "Sector": info.get("sector", "N/A"),
+            "MarketCap": info.get("marketCap", 0),
+            "PE": info.get("trailingPE", 0),
+            "LastUpdated": now.isoformat()
+        })
+
+    if not meta:
+        print("No data collected")
+        return
+
+    # Inner merge keeps TICKERS order (duplicates included) like the serial loop
+    records = pd.DataFrame(meta).merge(metrics, on="Ticker", how="inner")
+    records.to_csv("Structured_Portfolio_Data.csv", index=False)
+    print("Saved Structured_Portfolio_Data.csv")
+    print(f"Fundamentals cache: {cache.stats()}")
+
 if __name__ == "__main__":
-    fetch_portfolio_data()
+    fetch_portfolio_data_batched()
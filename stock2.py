@@ -4,15 +4,65 @@ import numpy as np
 from qiskit import QuantumCircuit
 from qiskit_aer import AerSimulator
 from datetime import datetime
+import sys
 import time
+from market_calendar import default_calendar
 
 # HFT focus: High liquidity stocks
 HFT_TICKERS = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'ICICIBANK.NS', 'INFY.NS']
 
+class AerSampler:
+    """Reference backend: the H + RY(theta) circuit run on AerSimulator."""
+
+    def __init__(self, seed=None):
+        # Matrix product state keeps this product circuit cheap at any width
+        self.simulator = AerSimulator(method="matrix_product_state")
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, thetas, shots=1):
+        """(shots, n) array of 0/1 outcomes, column i = qubit i."""
+        thetas = np.asarray(thetas, dtype=float)
+        num_qubits = len(thetas)
+        qc = QuantumCircuit(num_qubits, num_qubits)
+        qc.h(range(num_qubits))
+        for i, theta in enumerate(thetas):
+            qc.ry(theta, i)
+        qc.measure(range(num_qubits), range(num_qubits))
+
+        result = self.simulator.run(qc, shots=shots, memory=True,
+                                    seed_simulator=int(self.rng.integers(2 ** 31))).result()
+        # Qiskit bitstrings put qubit 0 last
+        bits = np.array([list(state[::-1]) for state in result.get_memory()])
+        return (bits == "1").astype(np.int8)
+
+class NumpySampler:
+    """Closed-form backend for the same circuit.
+
+    Every qubit gets its own H then RY(theta), so the state is a product
+    state and qubit i reads 1 with P = sin^2(theta_i / 2 + pi / 4)
+    independently of the others. Sampling is one uniform draw per qubit and
+    shot; thetas may carry leading axes (e.g. cycles x tickers).
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def probabilities(thetas):
+        return np.sin(np.asarray(thetas, dtype=float) / 2 + np.pi / 4) ** 2
+
+    def sample(self, thetas, shots=1):
+        """(shots, *thetas.shape) array of 0/1 outcomes."""
+        p = self.probabilities(thetas)
+        return (self.rng.random((shots,) + p.shape) < p).astype(np.int8)
+
+BACKENDS = {"aer": AerSampler, "numpy": NumpySampler}
+
 class QuantumHFTSimulator:
-    def __init__(self, tickers):
+    def __init__(self, tickers, backend="numpy", seed=None, calendar=None):
         self.tickers = tickers
-        self.simulator = AerSimulator()
+        self.calendar = calendar or default_calendar()
+        self.sampler = BACKENDS[backend](seed=seed)
 
     def get_real_time_data(self):
         """Fetches the latest 1-minute interval data."""
@@ -24,28 +74,16 @@ class QuantumHFTSimulator:
         Simulates a Quantum Circuit to find the optimal stock to trade
         based on price 'entanglement' (correlations).
         """
-        num_qubits = len(self.tickers)
-        qc = QuantumCircuit(num_qubits, num_qubits)
-
         # Step 1: Put qubits in superposition (Checking all possibilities)
-        qc.h(range(num_qubits))
-
         # Step 2: Apply 'Entanglement' based on stock correlations
         # If correlation is high, we apply a rotation gate (simulating quantum advantage)
-        for i in range(num_qubits):
-            correlation_weight = returns_correlation[i]
-            qc.ry(correlation_weight * np.pi, i) 
-
         # Step 3: Measurement
-        qc.measure(range(num_qubits), range(num_qubits))
-
-        # Run the virtual quantum circuit
-        job = self.simulator.run(qc, shots=1)
-        result = job.result()
-        counts = result.get_counts()
+        # The circuit itself lives in the sampler backend (see AerSampler)
+        thetas = np.asarray(returns_correlation, dtype=float) * np.pi
+        bits = self.sampler.sample(thetas, shots=1)[0]
         
-        # Get the winning 'state' (the optimized trade path)
-        winning_state = list(counts.keys())[0]
+        # Get the winning 'state' (the optimized trade path), Qiskit bit order
+        winning_state = "".join(str(bit) for bit in bits[::-1])
         return winning_state
 
     def run_hft_loop(self):
@@ -53,6 +91,11 @@ class QuantumHFTSimulator:
         
         try:
             while True:
+                if not self.calendar.is_active():
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {self.calendar.describe()}, sleeping")
+                    time.sleep(self.calendar.poll_interval(60))
+                    continue
+
                 # 1. Get Data
                 prices = self.get_real_time_data()
                 returns = prices.pct_change().mean()
@@ -67,15 +110,33 @@ class QuantumHFTSimulator:
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Quantum State: {quantum_decision}")
                 
                 for i, ticker in enumerate(self.tickers):
-                    action = "BUY" if quantum_decision[i] == '1' else "WAIT"
+                    # Qubit i is character -1 - i of the Qiskit bitstring
+                    action = "BUY" if quantum_decision[-1 - i] == '1' else "WAIT"
                     print(f"  > {ticker}: {action} (Price: {prices[ticker].iloc[-1]:.2f})")
                 
                 print("-" * 40)
-                time.sleep(60) # Wait for next minute candle
+                time.sleep(self.calendar.poll_interval(60)) # Next minute candle while open
 
         except KeyboardInterrupt:
             print("Shutting down Quantum Engine...")
 
+def benchmark(sizes=(10, 100, 1000), repeat=20, seed=0):
+    """Wall time per decision (one ticker, one cycle) for every backend."""
+    print(f"{'Tickers':>8}" + "".join(f"{name + ' us/dec':>16}" for name in BACKENDS))
+    for n in sizes:
+        thetas = np.random.default_rng(seed).uniform(0, np.pi, n)
+        row = f"{n:>8}"
+        for backend in BACKENDS.values():
+            sampler = backend(seed=seed)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                sampler.sample(thetas)
+            row += f"{(time.perf_counter() - start) / (repeat * n) * 1e6:>16.3f}"
+        print(row)
+
 if __name__ == "__main__":
-    engine = QuantumHFTSimulator(HFT_TICKERS)
-    engine.run_hft_loop()
\ No newline at end of file
+    if sys.argv[1:] == ["benchmark"]:
+        benchmark()
+    else:
+        engine = QuantumHFTSimulator(HFT_TICKERS)
+        engine.run_hft_loop()
\ No newline at end of file
@@ -1,42 +1,81 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from qiskit import QuantumCircuit
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit import Parameter
 from qiskit_aer import AerSimulator
 from datetime import datetime
 import time
+from latency import REGISTRY, timed
+from market_calendar import default_calendar
 
 # Focus on ultra-liquid tickers for HFT
 HFT_TICKERS = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS']
+SEED = 42
+
+class RYDecisionBackend:
+    """One parameterized RY circuit, transpiled once, evaluated for a whole batch.
+
+    decide() binds every ticker's theta into the cached circuit and runs them
+    as a single simulator job (one shot each), so the per-cycle overhead of
+    building, transpiling and submitting is paid once rather than per ticker.
+    Each job gets its simulator seed from one seeded generator, which keeps a
+    whole session reproducible.
+    """
+
+    def __init__(self, simulator=None, seed=SEED):
+        self.simulator = simulator or AerSimulator()
+        self.theta = Parameter("theta")
+        qc = QuantumCircuit(1, 1)
+        qc.ry(self.theta, 0)
+        qc.measure(0, 0)
+        self.circuit = transpile(qc, self.simulator)
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def thetas(imbalance_scores):
+        # Map -1...1 to 0...Pi
+        return (np.asarray(imbalance_scores, dtype=float) + 1) * np.pi / 2
+
+    def decide(self, imbalance_scores):
+        """0/1 measurement per imbalance score, in input order."""
+        thetas = self.thetas(imbalance_scores)
+        if len(thetas) == 0:
+            return np.zeros(0, dtype=int)
+        result = self.simulator.run(
+            self.circuit, shots=1,
+            parameter_binds=[{self.theta: thetas.tolist()}],
+            seed_simulator=int(self.rng.integers(2 ** 31)),
+        ).result()
+        return np.array([int(next(iter(result.get_counts(i)))) for i in range(len(thetas))])
 
 class QuantumHFTPro:
-    def __init__(self, tickers):
+    def __init__(self, tickers, seed=SEED, calendar=None):
         self.tickers = tickers
-        self.simulator = AerSimulator()
+        self.calendar = calendar or default_calendar()
+        self.backend = RYDecisionBackend(seed=seed)
         self.max_drawdown = -0.02  # Kill switch at 2% loss
         self.session_pnl = 0.0
 
     def get_market_microstructure(self, ticker):
         """Simulates HFT Order Book Imbalance (Bid vs Ask)"""
         # In real life, use L2/L3 data. Here we simulate imbalance from volatility.
-        ticker_obj = yf.Ticker(ticker)
-        data = ticker_obj.history(period="1d", interval="1m").tail(2)
+        with timed("fetch"):
+            ticker_obj = yf.Ticker(ticker)
+            data = ticker_obj.history(period="1d", interval="1m").tail(2)
         
-        # Simulate an imbalance: if current close > previous close, assume more buyers
-        close_prices = data['Close'].values
-        imbalance = (close_prices[-1] - close_prices[-2]) / close_prices[-2] if len(close_prices) > 1 else 0
-        return np.clip(imbalance * 100, -1, 1) # Scale for quantum gate
+        with timed("feature"):
+            # Simulate an imbalance: if current close > previous close, assume more buyers
+            close_prices = data['Close'].values
+            imbalance = (close_prices[-1] - close_prices[-2]) / close_prices[-2] if len(close_prices) > 1 else 0
+            return np.clip(imbalance * 100, -1, 1) # Scale for quantum gate
 
-    def quantum_logic(self, imbalance_score):
-        """Uses a Quantum Gate to decide trade intensity based on imbalance"""
-        qc = QuantumCircuit(1, 1)
-        # Apply rotation based on market imbalance
-        theta = (imbalance_score + 1) * np.pi / 2 # Map -1...1 to 0...Pi
-        qc.ry(theta, 0)
-        qc.measure(0, 0)
-        
-        result = self.simulator.run(qc, shots=1).result()
-        return int(list(result.get_counts().keys())[0])
+    def quantum_logic(self, imbalance_scores):
+        """Uses a Quantum Gate to decide trade intensity based on imbalance.
+
+        Takes the scores of every ticker and returns one 0/1 decision each.
+        """
+        return self.backend.decide(imbalance_scores)
 
     def run(self):
         print(f"🚀 Quantum HFT Engine Active | Safety: {self.max_drawdown*100}%")
@@ -45,22 +84,29 @@ class QuantumHFTPro:
                 if self.session_pnl <= self.max_drawdown:
                     print("🚨 CRITICAL: CIRCUIT BREAKER TRIGGERED. MAX DRAWDOWN REACHED.")
                     break
+                if not self.calendar.is_active():
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {self.calendar.describe()}, sleeping")
+                    time.sleep(self.calendar.poll_interval(30))
+                    continue
 
-                for ticker in self.tickers:
-                    start_time = time.perf_counter_ns()
-                    
-                    imbalance = self.get_market_microstructure(ticker)
-                    decision = self.quantum_logic(imbalance)
-                    
-                    # Simulate Latency
-                    end_time = time.perf_counter_ns()
-                    latency = (end_time - start_time) / 1000 # microseconds
-                    
+                start_time = time.perf_counter_ns()
+                
+                imbalances = [self.get_market_microstructure(ticker) for ticker in self.tickers]
+                with timed("decision"):
+                    decisions = self.quantum_logic(imbalances)
+                
+                # Fetch through decision for the whole cycle; emission is timed separately below
+                end_time = time.perf_counter_ns()
+                latency = (end_time - start_time) / 1000 # microseconds
+                
+                for ticker, decision in zip(self.tickers, decisions):
                     action = "BUY" if decision == 1 else "SELL"
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {ticker} | Signal: {action} | Latency: {latency:.2f}μs")
+                    with timed("emit"):
+                        print(f"[{datetime.now().strftime('%H:%M:%S')}] {ticker} | Signal: {action} | Cycle latency: {latency:.2f}μs")
                 
+                print(f"Latency: {REGISTRY.report()}")
                 print("-" * 50)
-                time.sleep(30) # HFT check every 30 seconds
+                time.sleep(self.calendar.poll_interval(30)) # HFT check every 30 seconds while open
         except KeyboardInterrupt:
             print("Engine Stopped.")
 
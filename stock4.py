@@ -1,25 +1,30 @@
 import yfinance as yf
 import time
 from datetime import datetime
+from latency import REGISTRY, timed
+from market_calendar import default_calendar
 
 class MinimalQuantumHFT:
-    def __init__(self):
+    def __init__(self, calendar=None):
         self.tickers = ['RELIANCE.NS', 'TCS.NS', 'INFY.NS']
         self.pnl = 0.0
         self.is_active = True
+        self.calendar = calendar or default_calendar()
 
     def get_data_packet(self):
         """ This is the exact JSON packet we will send to the frontend later """
         ticker = self.tickers[int(time.time() % 3)] # Cycle through tickers
         
         # 1. Real Data Fetch
-        price_data = yf.Ticker(ticker).history(period="1d", interval="1m").tail(1)
-        current_price = price_data['Close'].iloc[0] if not price_data.empty else 0
+        start = time.perf_counter_ns()
+        with timed("fetch"):
+            price_data = yf.Ticker(ticker).history(period="1d", interval="1m").tail(1)
+            current_price = price_data['Close'].iloc[0] if not price_data.empty else 0
         
         # 2. Simulated Quantum Logic & Latency
-        start = time.perf_counter_ns()
-        quantum_signal = "BUY" if (time.time() % 2 > 1) else "SELL" # Dummy quantum flip
-        latency = (time.perf_counter_ns() - start) / 1000 # in microseconds
+        with timed("decision"):
+            quantum_signal = "BUY" if (time.time() % 2 > 1) else "SELL" # Dummy quantum flip
+        latency = (time.perf_counter_ns() - start) / 1000 # in microseconds, fetch included
         
         return {
             "timestamp": datetime.now().strftime("%H:%M:%S"),
@@ -34,9 +39,15 @@ class MinimalQuantumHFT:
     def start_engine(self):
         print("Engine started. Press Ctrl+C to stop.")
         while self.is_active:
+            if not self.calendar.is_active():
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] {self.calendar.describe()}, sleeping")
+                time.sleep(self.calendar.poll_interval(2))
+                continue
             packet = self.get_data_packet()
-            print(f"[{packet['timestamp']}] {packet['ticker']} | {packet['signal']} | {packet['latency_us']}μs")
-            time.sleep(2) # Refresh every 2 seconds
+            with timed("emit"):
+                print(f"[{packet['timestamp']}] {packet['ticker']} | {packet['signal']} | {packet['latency_us']}μs")
+            print(f"    {REGISTRY.report()}")
+            time.sleep(self.calendar.poll_interval(2)) # Refresh every 2 seconds while open
 
 if __name__ == "__main__":
     engine = MinimalQuantumHFT()
@@ -1,8 +1,9 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
-import time
+from fetcher import default_executor
+from fundamentals import default_cache
+from history_store import HistoryStore
 
 TICKERS = [ 'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
     'BAJAJ-AUTO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'BPCL.NS', 'BHARTIARTL.NS',
@@ -33,44 +34,50 @@ def fetch_portfolio_data():
     now = datetime.now(TZ)
     records = []
 
-    for symbol in TICKERS:
-        try:
-            print(f"Fetching {symbol}")
-            ticker = yf.Ticker(symbol)
-
-            hist = ticker.history(period="12mo", actions=True)
-            if hist.empty:
+    cache = default_cache()
+    fundamentals = cache.get_many(TICKERS)
+    executor = default_executor()
+    store = HistoryStore(executor=executor)
+
+    def fetch_symbol(symbol):
+        print(f"Fetching {symbol}")
+
+        hist = store.history(symbol, period="12mo")
+        if hist.empty:
+            return []
+
+        info = fundamentals.get(symbol, {})
+        meta = {
+            "Symbol": symbol,
+            "Company": info.get("longName", symbol),
+            "Sector": info.get("sector", "N/A"),
+            "MarketCap": info.get("marketCap", 0),
+            "PE": info.get("trailingPE", 0),
+            "LastUpdated": now.isoformat()
+        }
+
+        rows = []
+        for _, days in PERIODS.items():
+            if days == 0:
+                df = hist.tail(1)
+            else:
+                start = now - timedelta(days=days)
+                df = hist[hist.index >= start]
+
+            if df.empty:
                 continue
 
-            info = ticker.info
-            meta = {
-                "Symbol": symbol,
-                "Company": info.get("longName", symbol),
-                "Sector": info.get("sector", "N/A"),
-                "MarketCap": info.get("marketCap", 0),
-                "PE": info.get("trailingPE", 0),
-                "LastUpdated": now.isoformat()
-            }
-
-            for _, days in PERIODS.items():
-                if days == 0:
-                    df = hist.tail(1)
-                else:
-                    start = now - timedelta(days=days)
-                    df = hist[hist.index >= start]
-
-                if df.empty:
-                    continue
+            dividends = df["Dividends"].sum() if "Dividends" in df else 0
+            metrics = cumulative_metrics(df, dividends)
 
-                dividends = df["Dividends"].sum() if "Dividends" in df else 0
-                metrics = cumulative_metrics(df, dividends)
+            rows.append({**meta, **metrics})
+        return rows
 
-                records.append({**meta, **metrics})
-
-            time.sleep(0.2)
-
-        except Exception as e:
-            print(f"{symbol} failed: {e}")
+    for symbol, rows, error in executor.fetch_all(fetch_symbol, TICKERS):
+        if error is not None:
+            print(f"{symbol} failed: {error}")
+            continue
+        records.extend(rows)
 
     if records:
         pd.DataFrame(records).to_csv("Structured_Portfolio_Data.csv", index=False)
@@ -78,5 +85,7 @@ def fetch_portfolio_data():
     else:
         print("No data collected")
 
+    print(f"Fundamentals cache: {cache.stats()}")
+
 if __name__ == "__main__":
     fetch_portfolio_data()
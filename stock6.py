@@ -1,8 +1,10 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
-import time
+from fetcher import default_executor
+from fundamentals import default_cache
+from history_store import HistoryStore
+from storage import save_frame
 
 TICKERS = [ 'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
     'BAJAJ-AUTO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'BPCL.NS', 'BHARTIARTL.NS',
@@ -30,46 +32,54 @@ def fetch_portfolio_data():
     now = datetime.now(TZ)
     records = []
 
-    for symbol in TICKERS:
-        try:
-            print(f"Fetching {symbol}")
-            ticker = yf.Ticker(symbol)
+    cache = default_cache()
+    fundamentals = cache.get_many(TICKERS)
+    executor = default_executor()
+    store = HistoryStore(executor=executor)
 
-            hist = ticker.history(period="6mo", actions=False)
-            if hist.empty:
-                continue
+    def fetch_symbol(symbol):
+        print(f"Fetching {symbol}")
 
-            info = ticker.info
+        hist = store.history(symbol, period="6mo")
+        if hist.empty:
+            return []
 
-            for period, days in PERIODS.items():
-                if days == 0:
-                    df = hist.tail(1)
-                else:
-                    start = now - timedelta(days=days)
-                    df = hist[hist.index >= start]
+        info = fundamentals.get(symbol, {})
 
-                if df.empty:
-                    continue
+        rows = []
+        for period, days in PERIODS.items():
+            if days == 0:
+                df = hist.tail(1)
+            else:
+                start = now - timedelta(days=days)
+                df = hist[hist.index >= start]
 
-                records.append({
-                    "Symbol": symbol,
-                    "Company": info.get("longName", symbol),
-                    "Sector": info.get("sector", "N/A"),
-                    "CurrentPrice": float(df["Close"].iloc[-1]),
-                    "Period": period,
-                    "LastUpdated": now.isoformat()
-                })
+            if df.empty:
+                continue
 
-            time.sleep(0.2)
+            rows.append({
+                "Symbol": symbol,
+                "Company": info.get("longName", symbol),
+                "Sector": info.get("sector", "N/A"),
+                "CurrentPrice": float(df["Close"].iloc[-1]),
+                "Period": period,
+                "LastUpdated": now.isoformat()
+            })
+        return rows
 
-        except Exception as e:
-            print(f"{symbol} failed: {e}")
+    for symbol, rows, error in executor.fetch_all(fetch_symbol, TICKERS):
+        if error is not None:
+            print(f"{symbol} failed: {error}")
+            continue
+        records.extend(rows)
 
     if records:
-        pd.DataFrame(records).to_csv("Holdings_Portfolio_Data.csv", index=False)
-        print("Saved Structured_Portfolio_Data.csv")
+        path = save_frame(pd.DataFrame(records), "Holdings_Portfolio_Data")
+        print(f"Saved {path}")
     else:
         print("No data collected")
 
+    print(f"Fundamentals cache: {cache.stats()}")
+
 if __name__ == "__main__":
     fetch_portfolio_data()
@@ -2,6 +2,7 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime
 import tabulate # Optional: pip install tabulate (for pretty printing)
+from fundamentals import default_cache
 
 TICKERS = [
     'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
@@ -25,7 +26,8 @@ def run_test():
     
     # 2. Fundamental Fetch
     print("Fetching company details (Sector, PE, Market Cap)...")
-    tickers_obj = yf.Tickers(" ".join(TICKERS))
+    cache = default_cache()
+    fundamentals = cache.get_many(TICKERS)
     
     results = []
     for symbol in TICKERS:
@@ -35,8 +37,8 @@ def run_test():
             price = ticker_subset['Close'].iloc[-1] if not ticker_subset.empty else "N/A"
             volume = ticker_subset['Volume'].iloc[-1] if not ticker_subset.empty else "N/A"
             
-            # Extract info
-            info = tickers_obj.tickers[symbol].info
+            # Extract info (served from the fundamentals cache)
+            info = fundamentals.get(symbol, {})
             
             results.append({
                 "Symbol": symbol,
@@ -53,6 +55,7 @@ def run_test():
     df = pd.DataFrame(results)
     print("\n" + df.to_string(index=False))
     print(f"\n--- Test Complete. Total Stocks Fetched: {len(results)} ---")
+    print(f"Fundamentals cache: {cache.stats()}")
 
 if __name__ == "__main__":
     run_test()
\ No newline at end of file
@@ -0,0 +1,243 @@
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+import pytz
+
+# Optional: pip install pyarrow (Parquet/Feather). Without it everything
+# falls back to CSV.
+try:
+    import pyarrow  # noqa: F401
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+TZ = pytz.timezone("Asia/Kolkata")
+
+# PORTFOLIO_STORAGE_FORMAT picks the primary format (parquet, feather, csv).
+# PORTFOLIO_EXPORT_CSV=0 stops writing the CSV copy next to it.
+STORAGE_FORMAT = os.environ.get("PORTFOLIO_STORAGE_FORMAT", "parquet")
+EXPORT_CSV = os.environ.get("PORTFOLIO_EXPORT_CSV", "1") != "0"
+
+EXTENSIONS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+COMPRESSION = "zstd"
+
+DATE_COLUMNS = ("Date", "Datetime")
+TICKER_COLUMNS = ("Ticker", "Symbol")
+# Repeated on every row of the long-format files, so stored as dictionaries
+CATEGORICAL_COLUMNS = ("Ticker", "Symbol", "Company Name", "Company", "Sector", "Period", "Type")
+
+DATASETS = [
+    "Full_NSE_Database",
+    "Daily_3Mo_Data",
+    "Monthly_Avg_Data",
+    "Holdings_Portfolio_Data",
+    "Market_Portfolio",
+]
+
+def _resolve_format(fmt):
+    fmt = fmt or STORAGE_FORMAT
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown storage format: {fmt}")
+    if fmt != "csv" and not HAS_ARROW:
+        print(f"pyarrow is not installed, writing CSV instead of {fmt}")
+        return "csv"
+    return fmt
+
+def _date_column(df):
+    return next((c for c in DATE_COLUMNS if c in df.columns), None)
+
+def _ticker_column(df):
+    return next((c for c in TICKER_COLUMNS if c in df.columns), None)
+
+def _bound(value):
+    """Date filter bound as a tz-aware timestamp (naive values are IST)."""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(TZ) if ts.tzinfo is None else ts
+
+def _normalize(df):
+    """Date index -> tz-aware column, repeated strings -> categoricals."""
+    if df.index.name in DATE_COLUMNS:
+        df = df.reset_index()
+    else:
+        df = df.copy()
+    date_col = _date_column(df)
+    if date_col is not None and not isinstance(df[date_col].dtype, pd.DatetimeTZDtype):
+        df[date_col] = pd.to_datetime(df[date_col], utc=True).dt.tz_convert(TZ)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def save_frame(df, name, fmt=None, partition_cols=None, export_csv=None):
+    """Writes df as <name>.<ext> in the configured format and returns the path.
+
+    Parquet output may be partitioned (e.g. by Ticker), which turns the path
+    into a directory of files that readers can prune. A CSV copy is exported
+    alongside unless disabled.
+    """
+    fmt = _resolve_format(fmt)
+    export_csv = EXPORT_CSV if export_csv is None else export_csv
+    path = name + EXTENSIONS[fmt]
+
+    if fmt == "csv":
+        df.to_csv(path, index=df.index.name in DATE_COLUMNS)
+        return path
+
+    # The CSV copy goes first so the primary file is the newest one and
+    # find_dataset() reads it rather than re-parsing the export
+    if export_csv:
+        df.to_csv(name + EXTENSIONS["csv"], index=df.index.name in DATE_COLUMNS)
+
+    table = _normalize(df)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    if fmt == "parquet":
+        table.to_parquet(path, engine="pyarrow", compression=COMPRESSION,
+                         partition_cols=partition_cols, index=False)
+    else:
+        table.to_feather(path, compression=COMPRESSION)
+    return path
+
+def _mtime(path):
+    """Modification time of a file, or of the newest file in a partitioned dataset."""
+    if os.path.isfile(path):
+        return os.path.getmtime(path)
+    return max((os.path.getmtime(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files),
+               default=os.path.getmtime(path))
+
+def find_dataset(name):
+    """Path and format of the newest stored copy of name.
+
+    A CSV rewritten by a script that knows nothing about Parquet must not be
+    shadowed by an older Parquet copy, so copies are ranked by modification
+    time; ties go to parquet > feather > csv.
+    """
+    copies = []
+    for rank, fmt in enumerate(("parquet", "feather", "csv")):
+        path = name + EXTENSIONS[fmt]
+        if os.path.exists(path) and (fmt == "csv" or HAS_ARROW):
+            copies.append((-_mtime(path), rank, path, fmt))
+    if not copies:
+        raise FileNotFoundError(f"No stored copy of {name}")
+    _, _, path, fmt = min(copies)
+    return path, fmt
+
+def _column_names(path, fmt):
+    """Column names of a stored copy without reading its rows (None if unknown)."""
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == "feather":
+        import pyarrow.ipc
+        return pyarrow.ipc.open_file(path).schema.names
+    if os.path.isfile(path):
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return None  # partitioned parquet directory
+
+def load_frame(name, columns=None, tickers=None, start=None, end=None, fmt=None):
+    """Reads a dataset with optional column projection and ticker/date filters.
+
+    Parquet pushes the ticker and date predicates down to partition and
+    row-group pruning. Feather and CSV only project columns on read and
+    filter afterwards. A filter column left out of `columns` is still read
+    for the filter and dropped from the result.
+    """
+    if fmt is None:
+        path, fmt = find_dataset(name)
+    else:
+        path = name + EXTENSIONS[fmt]
+
+    names = _column_names(path, fmt)
+    extra = []
+    if columns is not None:
+        columns = list(columns)
+        needed = []
+        if tickers is not None:
+            needed.append(next((c for c in TICKER_COLUMNS if names is None or c in names), "Ticker"))
+        if start is not None or end is not None:
+            needed.append(next((c for c in DATE_COLUMNS if names is None or c in names), "Date"))
+        extra = [c for c in needed if c not in columns and (names is None or c in names)]
+        columns = columns + extra
+
+    if fmt == "parquet":
+        filters = []
+        if tickers is not None:
+            ticker_col = next((c for c in TICKER_COLUMNS if names is None or c in names), "Ticker")
+            filters.append((ticker_col, "in", list(tickers)))
+        if start is not None or end is not None:
+            date_col = next((c for c in DATE_COLUMNS if names is None or c in names), "Date")
+            if start is not None:
+                filters.append((date_col, ">=", _bound(start)))
+            if end is not None:
+                filters.append((date_col, "<=", _bound(end)))
+        df = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters or None)
+        date_col = _date_column(df)
+        if date_col is not None:
+            df[date_col] = df[date_col].dt.tz_convert(TZ)
+        return df.drop(columns=extra)
+
+    if fmt == "feather":
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = _normalize(pd.read_csv(path, usecols=columns))
+
+    ticker_col = _ticker_column(df)
+    if tickers is not None and ticker_col is not None:
+        df = df[df[ticker_col].isin(tickers)]
+    date_col = _date_column(df)
+    if date_col is not None:
+        if start is not None:
+            df = df[df[date_col] >= _bound(start)]
+        if end is not None:
+            df = df[df[date_col] <= _bound(end)]
+    return df.drop(columns=extra).reset_index(drop=True)
+
+def convert(name, fmt="parquet", partition_cols=None):
+    """Converts an existing <name>.csv into fmt, keeping the CSV."""
+    df = pd.read_csv(name + EXTENSIONS["csv"])
+    return save_frame(df, name, fmt=fmt, partition_cols=partition_cols, export_csv=False)
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f))
+               for root, _, files in os.walk(path) for f in files)
+
+def _timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def benchmark(names=DATASETS):
+    """Load time (best of 5) and on-disk size of each CSV vs Parquet and Feather."""
+    if not HAS_ARROW:
+        print("pyarrow is not installed, nothing to compare against")
+        return
+
+    tmp = tempfile.mkdtemp()
+    try:
+        print(f"{'Dataset':<26}{'Format':<10}{'Size KB':>10}{'Load ms':>10}")
+        for name in names:
+            csv_path = name + EXTENSIONS["csv"]
+            if not os.path.exists(csv_path):
+                continue
+            df = pd.read_csv(csv_path)
+            rows = [("csv", _size(csv_path),
+                     _timed(lambda: _normalize(pd.read_csv(csv_path))))]
+            for fmt in ("parquet", "feather"):
+                target = os.path.join(tmp, name)
+                path = save_frame(df, target, fmt=fmt, export_csv=False)
+                rows.append((fmt, _size(path), _timed(lambda: load_frame(target, fmt=fmt))))
+            for fmt, size, ms in rows:
+                print(f"{name:<26}{fmt:<10}{size / 1024:>10.1f}{ms:>10.2f}")
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,6 +1,7 @@
 import yfinance as yf
 import pandas as pd
-import time
+from fetcher import default_executor
+from fundamentals import default_cache
 from flask import Flask, jsonify
 
 app = Flask(__name__)
@@ -10,17 +11,22 @@ def get_all_indian_stocks(limit=50):
                "BHARTIARTL.NS", "SBI.NS", "LICI.NS", "ITC.NS", "HINDUNILVR.NS"]     
     all_data = []
 
-    for symbol in tickers[:limit]: 
-        try:
-            ticker = yf.Ticker(symbol)            
-            hist = ticker.history(period="1mo")            
-            if not hist.empty:
-                hist['Ticker'] = symbol
-                hist['Company Name'] = ticker.info.get('longName', symbol)
-                all_data.append(hist)
-            time.sleep(0.5)             
-        except Exception as e:
-            print(f"Skipping {symbol}: {e}")
+    fundamentals = default_cache().get_many(tickers[:limit])
+
+    def fetch_symbol(symbol):
+        ticker = yf.Ticker(symbol)            
+        hist = ticker.history(period="1mo")            
+        if not hist.empty:
+            hist['Ticker'] = symbol
+            hist['Company Name'] = fundamentals.get(symbol, {}).get('longName', symbol)
+            return hist
+        return None
+
+    for symbol, hist, error in default_executor().fetch_all(fetch_symbol, tickers[:limit]):
+        if error is not None:
+            print(f"Skipping {symbol}: {error}")
+        elif hist is not None:
+            all_data.append(hist)
     
     if all_data:
         final_df = pd.concat(all_data)
@@ -0,0 +1,105 @@
+"""HistoryStore freshness against a fake upstream and a FakeClock."""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from history_store import MANIFEST, HistoryStore, period_to_timedelta
+from market_calendar import TZ, FakeClock, MarketCalendar
+
+MONDAY = datetime(2026, 10, 19)
+
+class FakeUpstream:
+    """Daily bars whose newest Close is whatever the clock says it is right now."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def bars(self):
+        now = self.clock()
+        days = pd.date_range(end=now.date(), periods=60, freq="B").tz_localize(TZ)
+        closes = [100.0 + i for i in range(len(days) - 1)] + [now.hour + now.minute / 60]
+        return pd.DataFrame({"Close": closes}, index=pd.DatetimeIndex(days, name="Date"))
+
+    def __call__(self, symbol, interval="1d", start=None, period=None):
+        self.calls.append((self.clock(), start, period))
+        df = self.bars()
+        if start is None:
+            start = self.clock() - period_to_timedelta(period)
+        return df[df.index >= start]
+
+@pytest.fixture
+def clock():
+    return FakeClock(MONDAY.replace(hour=15))
+
+@pytest.fixture
+def upstream(clock):
+    return FakeUpstream(clock)
+
+@pytest.fixture
+def store(tmp_path, clock, upstream):
+    return HistoryStore(root=str(tmp_path), fetcher=upstream,
+                        calendar=MarketCalendar(holidays=[], clock=clock))
+
+def at(clock, day, hour, minute=0):
+    clock.now = TZ.localize(day.replace(hour=hour, minute=minute))
+
+def test_open_market_reuses_a_sync_briefly(store, upstream, clock):
+    store.sync("AAA.NS", period="1mo")
+    clock.advance(10)
+    store.sync("AAA.NS", period="1mo")
+    assert len(upstream.calls) == 1
+    clock.advance(60)
+    store.sync("AAA.NS", period="1mo")
+    assert len(upstream.calls) == 2
+
+def test_next_session_is_fetched(store, upstream, clock):
+    store.sync("AAA.NS", period="1mo")
+    at(clock, MONDAY.replace(day=20), 10)  # Tuesday, market open
+    df = store.history("AAA.NS", period="1mo")
+    assert len(upstream.calls) == 2
+    assert df.index[-1].date() == MONDAY.replace(day=20).date()
+    assert df["Close"].iloc[-1] == 10.0
+    # Monday's partial 15:00 bar was replaced by its final value
+    assert df.index[-2].date() == MONDAY.date() and df["Close"].iloc[-2] != 15.0
+
+def test_current_bar_moves_during_the_session(store, upstream, clock):
+    closes = []
+    for hour in (10, 11, 12):
+        at(clock, MONDAY, hour)
+        closes.append(store.close_panel(["AAA.NS"], period="1mo")["AAA.NS"].iloc[-1])
+    assert closes == [10.0, 11.0, 12.0]
+
+def test_post_close_fetches_the_final_bar_once(store, upstream, clock):
+    store.sync("AAA.NS", period="1mo")
+    at(clock, MONDAY, 15, 45)
+    store.sync("AAA.NS", period="1mo")
+    assert len(upstream.calls) == 2
+    at(clock, MONDAY, 20)
+    store.sync("AAA.NS", period="1mo")
+    at(clock, MONDAY.replace(day=20), 9, 5)  # Tuesday pre-open: no new bar yet
+    store.sync("AAA.NS", period="1mo")
+    assert len(upstream.calls) == 2
+    assert store.read("AAA.NS")["Close"].iloc[-1] == 15.75
+
+def test_manifest_merges_other_processes(store, tmp_path, clock, upstream):
+    # A long-running process reads the (empty) manifest first ...
+    other = HistoryStore(root=str(tmp_path), fetcher=upstream,
+                         calendar=MarketCalendar(holidays=[], clock=clock))
+    # ... then a batch script stores three months of AAA.NS
+    other.sync("AAA.NS", period="3mo")
+    rows = len(other.read("AAA.NS"))
+    assert rows > 40
+
+    store.sync("BBB.NS", period="1mo")
+    assert set(store._read_manifest()) == {"AAA.NS|1d", "BBB.NS|1d"}
+
+    # A shorter sync through the stale process keeps the longer history on disk
+    clock.advance(60)
+    store.sync("AAA.NS", period="1mo")
+    assert len(store.read("AAA.NS")) == rows
+    assert store._read_manifest()["AAA.NS|1d"]["rows"] == rows
+    assert not (tmp_path / (MANIFEST + ".lock")).exists()
@@ -0,0 +1,153 @@
+"""MarketCalendar and the scheduler gate, driven by a FakeClock."""
+import json
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from market_calendar import (CLOSED, OPEN, POST_CLOSE_PHASE, PRE_OPEN_PHASE, SLOW_POLL_SECONDS, TZ,
+                             FakeClock, MarketCalendar, SessionGate, load_holidays)
+
+# Fri 16 Oct 2026, the weekend, then a (test) holiday on Tue 20 Oct
+FRIDAY = date(2026, 10, 16)
+HOLIDAY = date(2026, 10, 20)
+
+def ist(day, hour, minute=0, second=0):
+    return TZ.localize(datetime(day.year, day.month, day.day, hour, minute, second))
+
+@pytest.fixture
+def clock():
+    return FakeClock(datetime(2026, 10, 16, 8, 0))
+
+@pytest.fixture
+def calendar(clock):
+    return MarketCalendar(holidays=[HOLIDAY.isoformat()], clock=clock)
+
+@pytest.mark.parametrize("hour, minute, phase", [
+    (8, 59, CLOSED),
+    (9, 0, PRE_OPEN_PHASE),
+    (9, 14, PRE_OPEN_PHASE),
+    (9, 15, OPEN),
+    (12, 0, OPEN),
+    (15, 29, OPEN),
+    (15, 30, POST_CLOSE_PHASE),
+    (15, 59, POST_CLOSE_PHASE),
+    (16, 0, CLOSED),
+    (23, 0, CLOSED),
+])
+def test_phase_through_a_trading_day(calendar, clock, hour, minute, phase):
+    clock.now = ist(FRIDAY, hour, minute)
+    assert calendar.phase() == phase
+    assert calendar.is_open() == (phase == OPEN)
+    assert calendar.is_active() == (phase != CLOSED)
+
+def test_weekend_and_holiday_are_closed(calendar):
+    assert calendar.phase(ist(date(2026, 10, 17), 12)) == CLOSED  # Saturday
+    assert calendar.phase(ist(date(2026, 10, 18), 9, 5)) == CLOSED  # Sunday pre-open time
+    assert calendar.phase(ist(HOLIDAY, 9, 5)) == CLOSED
+    assert calendar.phase(ist(HOLIDAY, 12)) == CLOSED
+    assert calendar.phase(ist(date(2026, 10, 19), 12)) == OPEN  # Monday
+
+def test_phase_converts_other_timezones(calendar):
+    # 04:00 UTC is 09:30 IST
+    assert calendar.phase(pytz.utc.localize(datetime(2026, 10, 16, 4, 0))) == OPEN
+
+def test_next_open(calendar):
+    assert calendar.next_open(ist(FRIDAY, 8)) == ist(FRIDAY, 9, 15)
+    assert calendar.next_open(ist(FRIDAY, 9, 15)) == ist(date(2026, 10, 19), 9, 15)
+    assert calendar.next_open(ist(FRIDAY, 17)) == ist(date(2026, 10, 19), 9, 15)
+    # Monday after the close skips the Tuesday holiday
+    assert calendar.next_open(ist(date(2026, 10, 19), 16)) == ist(date(2026, 10, 21), 9, 15)
+
+def test_last_close(calendar):
+    assert calendar.last_close(ist(FRIDAY, 15, 30)) == ist(FRIDAY, 15, 30)
+    assert calendar.last_close(ist(FRIDAY, 15, 29)) == ist(date(2026, 10, 15), 15, 30)
+    assert calendar.last_close(ist(date(2026, 10, 18), 12)) == ist(FRIDAY, 15, 30)
+    assert calendar.last_close(ist(date(2026, 10, 21), 9)) == ist(date(2026, 10, 19), 15, 30)  # over the holiday
+
+def test_poll_interval_open_and_windows(calendar):
+    assert calendar.poll_interval(20, now=ist(FRIDAY, 11)) == 20
+    assert calendar.poll_interval(20, now=ist(FRIDAY, 15, 45)) == SLOW_POLL_SECONDS
+    assert calendar.poll_interval(20, now=ist(FRIDAY, 9, 0)) == SLOW_POLL_SECONDS
+    # Pre-open never sleeps past the bell, but never below the loop's own cadence
+    assert calendar.poll_interval(20, now=ist(FRIDAY, 9, 12)) == 180
+    assert calendar.poll_interval(20, now=ist(FRIDAY, 9, 14, 50)) == 20
+    # A slow loop keeps its cadence in the windows
+    assert calendar.poll_interval(3600, now=ist(FRIDAY, 15, 45)) == 3600
+
+def test_poll_interval_sleeps_to_next_pre_open(calendar, clock):
+    clock.now = ist(FRIDAY, 16)
+    clock.advance(calendar.poll_interval(20))
+    assert clock() == ist(date(2026, 10, 19), 9, 0)
+    assert calendar.phase() == PRE_OPEN_PHASE
+
+    clock.now = ist(date(2026, 10, 19), 23)
+    clock.advance(calendar.poll_interval(20))
+    assert clock() == ist(date(2026, 10, 21), 9, 0)  # over the holiday
+
+def test_loop_driven_by_poll_interval(calendar, clock):
+    """A 20 s loop from Friday 08:00 to Monday 10:00 only polls around and during sessions."""
+    clock.now = ist(FRIDAY, 8)
+    phases = []
+    while clock() < ist(date(2026, 10, 19), 10):
+        phases.append(calendar.phase())
+        clock.advance(calendar.poll_interval(20))
+    assert phases[0] == CLOSED
+    assert phases.count(PRE_OPEN_PHASE) == 2 * 3  # 09:00, 09:05, 09:10 on both days
+    assert phases.count(POST_CLOSE_PHASE) == 6    # 15:30 ... 15:55
+    assert phases.count(CLOSED) == 2              # Friday 08:00 and 16:00
+    assert phases.count(OPEN) == (6 * 3600 + 15 * 60) // 20 + 45 * 60 // 20
+
+def test_describe(calendar):
+    assert calendar.describe(ist(FRIDAY, 10)) == "market open until 15:30 IST"
+    assert calendar.describe(ist(FRIDAY, 16)) == "market closed, next session Mon 19 Oct 09:15 IST"
+
+def test_load_holidays(tmp_path):
+    path = tmp_path / "holidays.json"
+    path.write_text(json.dumps(["2026-10-20", "2026-11-09"]))
+    assert load_holidays(str(path)) == {date(2026, 10, 20), date(2026, 11, 9)}
+    assert load_holidays(str(tmp_path / "missing.json")) == set()
+
+def test_session_gate(calendar, clock):
+    gate = SessionGate(20, calendar)
+    clock.now = ist(FRIDAY, 8)
+    assert not gate.should_run()
+
+    clock.now = ist(FRIDAY, 9, 1)
+    assert gate.should_run()
+    clock.advance(20)
+    assert not gate.should_run()  # pre-open: slow cadence
+    clock.advance(SLOW_POLL_SECONDS)
+    assert gate.should_run()
+
+    clock.now = ist(FRIDAY, 10)
+    assert gate.should_run()
+    clock.advance(20)
+    assert gate.should_run()      # open: every tick
+
+    clock.now = ist(date(2026, 10, 17), 12)
+    assert not gate.should_run()  # weekend
+    clock.now = ist(HOLIDAY, 9, 5)
+    assert not gate.should_run()  # holiday
+
+@pytest.fixture
+def currentflask():
+    module = pytest.importorskip("currentflask")
+    module.scheduler.shutdown(wait=False)
+    return module
+
+def test_in_session_gates_scheduled_job(currentflask, calendar, clock):
+    runs = []
+    job = currentflask.in_session(lambda: runs.append(clock()), "test_gate", 20, calendar=calendar)
+
+    clock.now = ist(FRIDAY, 8)
+    job()
+    clock.now = ist(FRIDAY, 9, 1)
+    job()
+    job()
+    clock.now = ist(FRIDAY, 10)
+    job()
+    job()
+
+    assert runs == [ist(FRIDAY, 9, 1), ist(FRIDAY, 10), ist(FRIDAY, 10)]
+    assert currentflask.job_stats["test_gate"]["off_hours"] == 2
@@ -0,0 +1,151 @@
+"""mfapi streaming against a local chunked HTTP stub (no network)."""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import mutualfund
+from nav_store import MFAPI_DATE_FORMAT
+
+ROWS = 5000
+LATEST = datetime(2026, 1, 31)
+HTTP_CHUNK = 1024
+
+def mfapi_body(rows=ROWS):
+    data = [{"date": (LATEST - timedelta(days=i)).strftime(MFAPI_DATE_FORMAT), "nav": f"{100 + i * 0.01:.4f}"}
+            for i in range(rows)]
+    return json.dumps({"meta": {"scheme_code": 118989, "scheme_name": "Stub Fund"},
+                       "data": data, "status": "SUCCESS"}).encode()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server
+        with stub.lock:
+            stub.requests += 1
+            action = stub.plan.pop(0) if stub.plan else "ok"
+        if action == "error":
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if action == "slow":
+            time.sleep(stub.delay)  # past the client's read timeout, before any header
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        try:
+            for i in range(0, len(stub.body), HTTP_CHUNK):
+                block = stub.body[i:i + HTTP_CHUNK]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(block), block))
+                self.wfile.flush()
+                sent += len(block)
+                time.sleep(stub.pace)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        with stub.lock:
+            stub.sent.append(sent)
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.body = mfapi_body()
+    server.plan = []
+    server.requests = 0
+    server.sent = []
+    server.delay = 0.5
+    server.pace = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(mutualfund, "MFAPI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    # Fresh session per test so no pooled connection outlives its server
+    monkeypatch.setattr(mutualfund, "_local", threading.local())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def wait_for_handlers(stub, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(stub.sent) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_parser_stops_reading_after_n_rows():
+    body = mfapi_body().decode()
+    consumed = []
+
+    def chunks():
+        for i in range(0, len(body), 256):
+            consumed.append(i)
+            yield body[i:i + 256]
+
+    meta, navs = mutualfund.parse_latest_navs(chunks(), n=2)
+    assert meta["scheme_name"] == "Stub Fund"
+    assert [row["date"] for row in navs] == ["31-01-2026", "30-01-2026"]
+    assert len(consumed) < 5
+
+def test_parser_reads_full_history_in_small_chunks():
+    body = mfapi_body().decode()
+    meta, navs = mutualfund.parse_latest_navs((body[i:i + 7] for i in range(0, len(body), 7)),
+                                              n=2, until=lambda row: False)
+    assert meta["scheme_code"] == 118989
+    assert len(navs) == ROWS
+    assert navs[-1] == json.loads(body)["data"][-1]
+
+def test_fetch_stops_early(stub):
+    stub.pace = 0.002
+    meta, navs = mutualfund.fetch_latest_navs("118989", n=2)
+    assert meta["scheme_name"] == "Stub Fund"
+    assert len(navs) == 2
+    wait_for_handlers(stub, 1)
+    assert stub.sent and stub.sent[0] < len(stub.body)
+
+def test_fetch_until_cursor(stub):
+    since = datetime(2026, 1, 20)
+    meta, navs = mutualfund.fetch_navs_since("118989", since)
+    dates = [datetime.strptime(row["date"], MFAPI_DATE_FORMAT) for row in navs]
+    # Everything newer than the cursor plus the boundary row, and nothing older
+    assert dates[0] == LATEST
+    assert dates[-1] == since
+    assert len(navs) == 12
+
+def test_fetch_full_history_without_cursor(stub):
+    meta, navs = mutualfund.fetch_navs_since("118989", None)
+    assert len(navs) == ROWS
+
+def test_retries_5xx(stub):
+    stub.plan = ["error", "error"]
+    meta, navs = mutualfund.fetch_latest_navs("118989", n=2)
+    assert len(navs) == 2
+    assert stub.requests == 3
+
+def test_gives_up_after_retries(stub):
+    stub.plan = ["error"] * 10
+    with pytest.raises(requests.exceptions.RequestException):
+        mutualfund.fetch_latest_navs("118989", n=2)
+    assert stub.requests == 4  # first try + Retry(total=3)
+
+def test_retries_read_timeout(stub, monkeypatch):
+    monkeypatch.setattr(mutualfund, "TIMEOUT", (1, 0.2))
+    stub.plan = ["slow"]
+    meta, navs = mutualfund.fetch_latest_navs("118989", n=2)
+    assert len(navs) == 2
+    assert stub.requests == 2
+
+def test_fetch_mf_data_retries_in_transport_only(stub, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stub.plan = ["error"] * 20
+    mutualfund.fetch_mf_data({"118989": "Stub Fund"})
+    assert stub.requests == 4  # transport retries only, no executor retries on top
@@ -0,0 +1,30 @@
+"""RollingMoments window bookkeeping."""
+import numpy as np
+import pandas as pd
+
+from rolling_moments import RollingMoments
+
+def _prices(days=200, n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2026-01-01", periods=days, freq="B")
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, n)), axis=0)),
+                        index=index, columns=[f"T{i}" for i in range(n)])
+
+def test_ewma_keeps_only_the_window_for_shrinkage():
+    prices = _prices()
+    engine = RollingMoments(prices.columns, window=21, halflife=10, shrinkage=True).extend(prices)
+    assert len(engine.rows) == 21
+    assert engine.rows[-1][0] == prices.index[-1]
+    # Eviction does not touch the EWMA moments themselves
+    full = RollingMoments(prices.columns, window=10 ** 6, halflife=10).extend(prices)
+    np.testing.assert_allclose(engine.mean(), full.mean())
+
+def test_ewma_revision_after_eviction():
+    prices = _prices(days=40)
+    engine = RollingMoments(prices.columns, window=21, halflife=10).extend(prices)
+    revised = prices.copy()
+    revised.iloc[-1] *= 1.01
+    engine.extend(revised)
+    reference = RollingMoments(prices.columns, window=21, halflife=10).extend(revised)
+    assert [t for t, _ in engine.rows] == [t for t, _ in reference.rows]
+    np.testing.assert_allclose(engine.cov(), reference.cov())
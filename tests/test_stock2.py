@@ -0,0 +1,41 @@
+"""Statistical equivalence of the NumPy sampler and the Aer reference circuit."""
+import numpy as np
+import pytest
+
+pytest.importorskip("qiskit_aer")
+pytest.importorskip("yfinance")
+
+from stock2 import AerSampler, NumpySampler
+
+SHOTS = 4000
+Z_LIMIT = 4.0  # per-qubit |z|; with 8 qubits a false alarm is ~1 in 2000 runs at most
+
+@pytest.fixture
+def thetas():
+    return np.random.default_rng(0).uniform(0, np.pi, 8)
+
+@pytest.mark.parametrize("backend", [AerSampler, NumpySampler])
+def test_matches_closed_form(backend, thetas):
+    expected = NumpySampler.probabilities(thetas)
+    observed = backend(seed=1).sample(thetas, shots=SHOTS).mean(axis=0)
+    stderr = np.sqrt(expected * (1 - expected) / SHOTS) + 1e-12
+    assert np.all(np.abs((observed - expected) / stderr) < Z_LIMIT)
+
+def test_aer_and_numpy_agree(thetas):
+    aer = AerSampler(seed=2).sample(thetas, shots=SHOTS).mean(axis=0)
+    fast = NumpySampler(seed=2).sample(thetas, shots=SHOTS).mean(axis=0)
+    pooled = (aer + fast) / 2
+    stderr = np.sqrt(2 * pooled * (1 - pooled) / SHOTS) + 1e-12
+    assert np.all(np.abs((aer - fast) / stderr) < Z_LIMIT)
+
+def test_qubit_order():
+    # theta = pi/2 always reads 1, theta = -pi/2 always reads 0
+    thetas = [np.pi / 2, -np.pi / 2, -np.pi / 2]
+    for backend in (AerSampler, NumpySampler):
+        bits = backend(seed=0).sample(thetas, shots=16)
+        assert bits.shape == (16, 3)
+        assert (bits == [1, 0, 0]).all()
+
+def test_numpy_sampler_broadcasts():
+    bits = NumpySampler(seed=0).sample(np.zeros((5, 3)), shots=7)
+    assert bits.shape == (7, 5, 3)
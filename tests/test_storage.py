@@ -0,0 +1,51 @@
+"""save_frame / load_frame round trips pick the columnar copy."""
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import storage
+
+@pytest.fixture
+def frame(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dates = pd.date_range("2026-10-12", periods=5, freq="D")
+    return pd.DataFrame({
+        "Date": list(dates) * 2,
+        "Ticker": ["AAA.NS"] * 5 + ["BBB.NS"] * 5,
+        "Close": [float(i) for i in range(10)],
+        "Volume": list(range(10)),
+    })
+
+def _no_csv(monkeypatch):
+    def read_csv(*args, **kwargs):
+        raise AssertionError("load_frame re-parsed the CSV export")
+    monkeypatch.setattr(pd, "read_csv", read_csv)
+
+@pytest.mark.parametrize("partition_cols", [None, ["Ticker"]])
+def test_save_then_load_reads_parquet(frame, monkeypatch, partition_cols):
+    path = storage.save_frame(frame, "H", fmt="parquet", partition_cols=partition_cols, export_csv=True)
+    assert os.path.exists("H.csv")
+    assert storage.find_dataset("H") == (path, "parquet")
+
+    _no_csv(monkeypatch)
+    df = storage.load_frame("H", columns=["Close"], tickers=["BBB.NS"], start="2026-10-14")
+    assert list(df.columns) == ["Close"]
+    assert df["Close"].tolist() == [7.0, 8.0, 9.0]
+
+def test_save_then_load_reads_feather(frame, monkeypatch):
+    storage.save_frame(frame, "H", fmt="feather", export_csv=True)
+    assert storage.find_dataset("H") == ("H.feather", "feather")
+    _no_csv(monkeypatch)
+    assert len(storage.load_frame("H", tickers=["AAA.NS"])) == 5
+
+def test_newer_csv_wins(frame):
+    storage.save_frame(frame, "H", fmt="parquet", export_csv=True)
+    # A script that only knows CSV rewrites the export later on
+    frame.head(3).to_csv("H.csv", index=False)
+    later = os.path.getmtime("H.parquet") + 10
+    os.utime("H.csv", (later, later))
+    assert storage.find_dataset("H") == ("H.csv", "csv")
+    assert len(storage.load_frame("H")) == 3